@@ -1,19 +1,66 @@
 import os
+import logging
 from web3 import Web3
-from eth_account import Account
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from flask_smorest import Blueprint, abort
 from werkzeug.exceptions import HTTPException
-from app.services.gemini_service import check_post_authenticity, rate_post_content
+from app.services.gemini_service import check_post_authenticity, record_submitted_post
+from app.services.announcement_job import start_or_resume_announcement
+from app.services.submission_queue import submission_queue, QueueFullError
 from app.services.ipfs_service import upload_post_and_get_cid
-from app.blockchain.web3_config import OWNER_PRIVATE_KEY, LINKEDIN_CONTRACT_ADDRESS
+from app.blockchain.web3_instance import get_provider_stats
 from app.blockchain.verification_service import verify_register_data, verify_post_submit_data
-from app.blockchain.web3_services import register_user, get_username, submit_user_cid, get_is_post_submitted, get_all_posts_data, announce_winner
-from app.api.schemas import RegisterDataSchema, PostSubmitSchema
+from app.blockchain.web3_services import register_user, get_username, submit_user_cid, get_is_post_submitted, get_transaction_status, get_users_status, get_cid_submission_status
+from app.api.schemas import RegisterDataSchema, PostSubmitSchema, UserStatusQuerySchema
+from app.api.validation import validation_stage, validate_register_shape, validate_post_submit_shape, count_passed, get_validation_counts
+from app.services.metrics_service import register_collector, render_metrics
+from app.services.image_service import image_stats
+from app.services.post_cache import post_cache
+from app.services.logging_service import dropped_log_records
+
+logger = logging.getLogger(__name__)
+
+USER_STATUS_MAX_ADDRESSES = int(os.getenv("USER_STATUS_MAX_ADDRESSES", "5000"))
 
 post_blp = Blueprint("linkedin_post", __name__, description="Opreations that involves Gemini API")
 
 
+@register_collector
+def collect_service_stats():
+    validation_counts = get_validation_counts()
+    cache_stats = post_cache.stats()
+    return [
+        ("validation_rejections_total", "counter", "Requests rejected by each validation stage.",
+            [({"stage": stage}, count) for stage, count in validation_counts["rejected"].items()]),
+        ("validation_passed_total", "counter", "Requests that passed every validation stage.",
+            [({"endpoint": endpoint}, count) for endpoint, count in validation_counts["passed"].items()]),
+        ("screenshots_processed_total", "counter", "Screenshots preprocessed before the vision call.",
+            [({}, image_stats["processed"])]),
+        ("screenshot_bytes_total", "counter", "Screenshot bytes before and after preprocessing.",
+            [({"stage": "original"}, image_stats["original_bytes"]), ({"stage": "processed"}, image_stats["processed_bytes"])]),
+        ("post_cache_lookups_total", "counter", "Post cache lookups by result.",
+            [({"result": "hit"}, cache_stats["hits"]), ({"result": "miss"}, cache_stats["misses"])]),
+        ("post_cache_evictions_total", "counter", "Posts evicted from the disk cache.",
+            [({}, cache_stats["evictions"])]),
+        ("post_cache_disk_bytes", "gauge", "Bytes used by the disk post cache.",
+            [({}, cache_stats["disk_bytes"])]),
+        ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full.",
+            [({}, dropped_log_records())]),
+    ] + collect_rpc_endpoint_stats()
+
+
+def collect_rpc_endpoint_stats():
+    endpoints = get_provider_stats()
+    return [
+        ("rpc_endpoint_up", "gauge", "1 when the RPC endpoint is in rotation, 0 when ejected or lagging.",
+            [({"endpoint": endpoint["endpoint"]}, int(endpoint["state"] != "open" and not endpoint["lagging"])) for endpoint in endpoints]),
+        ("rpc_endpoint_latency_seconds", "gauge", "Median latency over the endpoint's rolling window.",
+            [({"endpoint": endpoint["endpoint"]}, endpoint["latency_ms"] / 1000) for endpoint in endpoints]),
+        ("rpc_endpoint_failures_total", "counter", "Failed requests per RPC endpoint.",
+            [({"endpoint": endpoint["endpoint"]}, endpoint["failures"]) for endpoint in endpoints]),
+    ]
+
+
 @post_blp.route("/welcome", methods=["GET"])
 def welcome():
     return jsonify({"message": "Welcome to the LinkedIn Post Rewards"})
@@ -27,19 +74,23 @@ def register(request_data):
         signed_message = request_data["signedMessage"]
         username = request_data["username"]
         
-        if verify_register_data(wallet_address=wallet_address, signed_message=signed_message, username=username):
-            user_address = wallet_address
-        
-        print(user_address)
+        with validation_stage("shape"):
+            validate_register_shape(wallet_address=wallet_address, signed_message=signed_message, username=username)
 
+        with validation_stage("signature"):
+            if verify_register_data(wallet_address=wallet_address, signed_message=signed_message, username=username):
+                user_address = wallet_address
+
+        count_passed("register-user")
+        
         tx_hash = register_user(user_address=user_address, username=username)
-        print(tx_hash)
+        logger.info("User registered", extra={"user_address": user_address, "tx_hash": tx_hash})
         return ({ 'success' : 'user registered successfully!!', "tx_hash" : tx_hash, "user_address" : user_address })
     except HTTPException as http_err:
         # Re-raise so Smorest handles it cleanly
         raise http_err
     except Exception as err :
-        print(f"Error in post submitting : {err}")
+        logger.exception("Error in registering the user: %s", err)
         abort(500,
             message="Error submitting the post."
             )    
@@ -52,6 +103,11 @@ def submit_post(request_data):
     Initially Verify the post via Gemini API,
     if post is verified, and submit it ipfs to get Cid,
     then sending cid to frontend for storing in the database.
+
+    With ?async=true only the signature and on-chain checks run in the request;
+    the rest is queued and the response carries a job id to poll at /jobs/<job_id>.
+    With CID batching, a CID whose batch isn't sent within CID_BATCH_SEND_TIMEOUT
+    gets a 202 pointing at /submissions/<user_address> instead of a transaction hash.
     """
 
     try:
@@ -60,35 +116,66 @@ def submit_post(request_data):
         user_address = request_data["userAddress"]
         signed_message = request_data["signedMessage"]
 
-        if verify_post_submit_data(post_base64=post_base64, post_content=post_content, user_address=user_address, signed_message=signed_message):
+        # Cheapest checks first, so bad payloads never reach Gemini or Pinata
+        with validation_stage("shape"):
+            validate_post_submit_shape(user_address=user_address, post_content=post_content, post_base64=post_base64, signed_message=signed_message)
+
+        with validation_stage("signature"):
+            verify_post_submit_data(post_base64=post_base64, post_content=post_content, user_address=user_address, signed_message=signed_message)
+
+        with validation_stage("chain_state"):
             linkedin_username = get_username(user_address=user_address)
 
-        if not linkedin_username:
-            abort(
-                400,
-                message="You are not registered for the dapp."
-            )
-        print(LINKEDIN_CONTRACT_ADDRESS)
-        print("LinkedIn username : ", linkedin_username)
-        if get_is_post_submitted(user_address=user_address):
-            abort(
-                400,
-                message="You have already submitted the post."
-            )
-
-        if check_post_authenticity(post_content=post_content, post_base64=post_base64):
-            cid = upload_post_and_get_cid(post_content=post_content, linkedin_username=linkedin_username)
+            if not linkedin_username:
+                abort(
+                    400,
+                    message="You are not registered for the dapp."
+                )
+            if get_is_post_submitted(user_address=user_address):
+                abort(
+                    400,
+                    message="You have already submitted the post."
+                )
+
+        count_passed("submit-post")
+
+        if request.args.get("async", "").lower() == "true":
+            try:
+                job_id = submission_queue.enqueue(
+                    user_address=user_address,
+                    post_content=post_content,
+                    post_base64=post_base64,
+                    linkedin_username=linkedin_username
+                )
+            except QueueFullError as err:
+                logger.warning("Submission queue full: %s", err)
+                abort(503, message="Too many submissions are being processed, please try again shortly.")
+
+            return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
+        post_fingerprint = check_post_authenticity(post_content=post_content, post_base64=post_base64, user_address=user_address)
+        if post_fingerprint:
+            cid = upload_post_and_get_cid(post_content=post_content, linkedin_username=linkedin_username, user_address=user_address)
 
         tx_hash = submit_user_cid(user_address=user_address, post_cid=cid)
+        if tx_hash is None:
+            # Batched and its batch not sent yet: it will be, but it isn't on its way to the chain
+            return jsonify({
+                "message": "Your post data matched and is queued for the blockchain.",
+                "upload_cid": cid,
+                "linkedin_username": linkedin_username,
+                "status_url": f"/submissions/{user_address}"
+            }), 202
+        record_submitted_post(user_address, post_fingerprint)
 
         return {"success" : "Congratulations !! Your post data matched and is added to the blockchain !!", "upload_cid" : cid, "linkedin_username" : linkedin_username, "tx_hash" : tx_hash}
     
     except HTTPException as http_err:
-        print(http_err)
+        logger.info("Post submission rejected: %s", http_err)
         # Re-raise so Smorest handles it cleanly
         raise http_err
     except Exception as err :
-        print(f"Error in post submitting : {err}")
+        logger.exception("Error in post submitting: %s", err)
         abort(500,
             message="Error submitting the post."
             )    
@@ -98,43 +185,103 @@ def submit_post(request_data):
 def announce_result():
     """
     This endpoint is used to announce the result of the post submission.
-    It will return the winner users who post content got maximum rating by AI.
+    The first call starts a background job that rates every submitted post;
+    later calls report its progress (202) until the winner is announced on chain,
+    then return the winner (200). A failed or interrupted job resumes from its checkpoint.
+    There is one announcement per contract; submissions made after it started are not rated.
     """
     try:
-        # Fetch all registered users and their post submission status
-        
-        submitted_post_data = get_all_posts_data()
-        if not submitted_post_data:
+        announcement = start_or_resume_announcement()
+        if not announcement:
             return jsonify({"message": "No posts found."}), 404
-        
-        print(submitted_post_data)
-        
-        highest_rating = {}
-        
-        for user_address in submitted_post_data.keys():
-            post_content = submitted_post_data[user_address].get("post_content")
-            post_rating = (rate_post_content(post_content=post_content))
-            submitted_post_data[user_address]["post_rating"] = post_rating
-            if post_rating > highest_rating.get("rating", 0):
-                highest_rating = {
-                    "user_address": user_address,
-                    "rating": post_rating
-                }
-            print(f"User Address: {user_address}, Post Rating: {post_rating}")
-
 
-        if not highest_rating:
-            abort(500,message="Error fetching results and ratings.")
+        if announcement["status"] != "finished":
+            return jsonify(announcement), 202
 
-        txn_hash = announce_winner(winner_address=highest_rating["user_address"])
-
-        print(f"Highest Rating User: {highest_rating['user_address']}, Rating: {highest_rating['rating']}")
-
-        return jsonify({**highest_rating, "txn_hash":txn_hash}), 200
+        return jsonify({
+            **announcement["winner"],
+            "txn_hash": announcement["txn_hash"],
+            "failed_downloads": announcement["failed_downloads"]
+        }), 200
     except HTTPException as http_err:
-        print(http_err)
+        logger.info("Announcement request rejected: %s", http_err)
         # Re-raise so Smorest handles it cleanly
         raise http_err
     except Exception as err:
-        print(f"Error in announcing result: {err}")
-        abort(500, message="Error fetching results.")
\ No newline at end of file
+        logger.exception("Error in announcing result: %s", err)
+        abort(500, message="Error fetching results.")
+
+
+@post_blp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Latency histograms, error counters and in-flight gauges in the Prometheus text format.
+    """
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@post_blp.route("/validation-stats", methods=["GET"])
+def validation_stats():
+    """
+    Requests rejected at each validation stage before any expensive work, and requests that passed.
+    """
+    return jsonify(get_validation_counts()), 200
+
+
+@post_blp.route("/jobs/<string:job_id>", methods=["GET"])
+def submission_job_status(job_id):
+    """
+    Report the state of an asynchronous post submission and each of its stages.
+    """
+    job = submission_queue.get(job_id)
+    if not job:
+        abort(404, message="Submission job not found.")
+
+    return jsonify(job), 200
+
+
+@post_blp.route("/tx/<string:tx_hash>", methods=["GET"])
+def transaction_status(tx_hash):
+    """
+    Report whether a transaction sent by this backend is pending, confirmed, failed or dropped.
+    """
+    tx_status = get_transaction_status(tx_hash)
+    if not tx_status:
+        abort(404, message="Transaction is not tracked by this server.")
+
+    return jsonify(tx_status), 200
+
+
+@post_blp.route("/submissions/<string:user_address>", methods=["GET"])
+def cid_submission_status(user_address):
+    """
+    Report whether a user's CID is queued for a batch, sent, included on chain or failed.
+    Only available when CID batching is enabled.
+    """
+    if not Web3.is_address(user_address):
+        abort(400, message="Invalid wallet address.")
+
+    submission_status = get_cid_submission_status(user_address)
+    if not submission_status:
+        abort(404, message="No batched submission is tracked for this address.")
+
+    return jsonify(submission_status), 200
+
+
+@post_blp.route("/users/status", methods=["POST"])
+@post_blp.arguments(UserStatusQuerySchema)
+def users_status(request_data):
+    """
+    Bulk lookup of registration and submission status for many wallets,
+    read from the contract in batched JSON-RPC calls.
+    """
+    user_addresses = request_data["userAddresses"]
+
+    if len(user_addresses) > USER_STATUS_MAX_ADDRESSES:
+        abort(400, message=f"At most {USER_STATUS_MAX_ADDRESSES} addresses can be checked per request.")
+
+    invalid_addresses = [user_address for user_address in user_addresses if not Web3.is_address(user_address)]
+    if invalid_addresses:
+        abort(400, message=f"Invalid wallet addresses: {', '.join(invalid_addresses[:10])}")
+
+    return jsonify({"users": get_users_status(user_addresses)}), 200
@@ -1,12 +1,30 @@
-from marshmallow import Schema, fields
-
-class PostSubmitSchema(Schema):
-    userAddress = fields.Str(load_only=True)
-    postContent = fields.Str(load_only=True)
-    postBase64 = fields.Str(load_only=True)
-    signedMessage = fields.Str(load_only=True)
-
-class RegisterDataSchema(Schema):
-    walletAddress = fields.Str(load_only=True)
-    signedMessage = fields.Str(load_only=True)
-    username = fields.Str(load_only=True)
\ No newline at end of file
+from marshmallow import Schema, fields, validate
+from app.api.validation import (
+    count_rejection,
+    POST_CONTENT_MAX_CHARS,
+    POST_BASE64_MAX_CHARS,
+    USERNAME_MAX_CHARS,
+    SIGNATURE_MAX_CHARS,
+    ADDRESS_MAX_CHARS,
+)
+
+class CountedSchema(Schema):
+    """
+    Counts payloads rejected by schema validation, the cheapest validation stage.
+    """
+    def handle_error(self, error, data, **kwargs):
+        count_rejection("schema")
+
+class PostSubmitSchema(CountedSchema):
+    userAddress = fields.Str(required=True, load_only=True, validate=validate.Length(max=ADDRESS_MAX_CHARS))
+    postContent = fields.Str(required=True, load_only=True, validate=validate.Length(max=POST_CONTENT_MAX_CHARS))
+    postBase64 = fields.Str(required=True, load_only=True, validate=validate.Length(max=POST_BASE64_MAX_CHARS))
+    signedMessage = fields.Str(required=True, load_only=True, validate=validate.Length(max=SIGNATURE_MAX_CHARS))
+
+class RegisterDataSchema(CountedSchema):
+    walletAddress = fields.Str(required=True, load_only=True, validate=validate.Length(max=ADDRESS_MAX_CHARS))
+    signedMessage = fields.Str(required=True, load_only=True, validate=validate.Length(max=SIGNATURE_MAX_CHARS))
+    username = fields.Str(required=True, load_only=True, validate=validate.Length(max=USERNAME_MAX_CHARS))
+
+class UserStatusQuerySchema(Schema):
+    userAddresses = fields.List(fields.Str(), required=True, load_only=True)
@@ -0,0 +1,108 @@
+import os
+import re
+import threading
+from contextlib import contextmanager
+from collections import Counter
+from web3 import Web3
+from flask_smorest import abort
+from werkzeug.exceptions import HTTPException
+from app.services.image_service import IMAGE_MAX_UPLOAD_BYTES
+
+POST_CONTENT_MAX_CHARS = int(os.getenv("POST_CONTENT_MAX_CHARS", "5000"))
+USERNAME_MAX_CHARS = int(os.getenv("USERNAME_MAX_CHARS", "100"))
+SIGNATURE_MAX_CHARS = 132
+ADDRESS_MAX_CHARS = 42
+# base64 grows data by 4/3; leave room for a data URL prefix
+POST_BASE64_MAX_CHARS = (IMAGE_MAX_UPLOAD_BYTES + 2) // 3 * 4 + 64
+
+_SIGNATURE_PATTERN = re.compile(r"^(0x)?[0-9a-fA-F]{130}$")
+_BASE64_PATTERN = re.compile(r"^[A-Za-z0-9+/]+={0,2}$")
+
+# Rejections per validation stage, cheapest first
+REJECTION_STAGES = ("schema", "shape", "signature", "chain_state")
+
+_rejections = Counter()
+_passed = Counter()
+_counts_lock = threading.Lock()
+
+
+def count_rejection(stage):
+    with _counts_lock:
+        _rejections[stage] += 1
+
+
+def count_passed(endpoint):
+    with _counts_lock:
+        _passed[endpoint] += 1
+
+
+def get_validation_counts():
+    with _counts_lock:
+        return {
+            "rejected": {stage: _rejections[stage] for stage in REJECTION_STAGES},
+            "passed": dict(_passed),
+        }
+
+
+@contextmanager
+def validation_stage(stage):
+    """
+    Count any request rejected inside this block against the given stage.
+    """
+    try:
+        yield
+    except HTTPException:
+        count_rejection(stage)
+        raise
+
+
+def check_address(address):
+    if not address or not Web3.is_address(address):
+        abort(400, message="Invalid wallet address!!")
+    # Mixed-case addresses carry an EIP-55 checksum that has to be valid
+    if address[2:] != address[2:].lower() and address[2:] != address[2:].upper() and not Web3.is_checksum_address(address):
+        abort(400, message="Wallet address checksum is invalid!!")
+
+
+def check_signature_shape(signed_message):
+    if not signed_message or not _SIGNATURE_PATTERN.match(signed_message.strip()):
+        abort(400, message="Signed message must be a 65 byte hex signature.")
+
+
+def check_base64_image_shape(post_base64):
+    """
+    Check base64 shape and decoded size without decoding the image.
+    """
+    if not post_base64 or not post_base64.strip():
+        abort(400, message="Image can't be empty!!")
+
+    if post_base64.startswith("data:") and "," in post_base64:
+        post_base64 = post_base64.split(",", 1)[1]
+
+    if len(post_base64) % 4 or not _BASE64_PATTERN.match(post_base64):
+        abort(400, message="Image is not valid base64 data.")
+
+    decoded_size = len(post_base64) // 4 * 3 - post_base64.count("=", len(post_base64) - 2)
+    if decoded_size > IMAGE_MAX_UPLOAD_BYTES:
+        abort(413, message=f"Image is larger than {IMAGE_MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+
+def validate_post_submit_shape(user_address, post_content, post_base64, signed_message):
+    """
+    Cheap structural checks for /submit-post, run before any signature recovery or network call.
+    """
+    if not post_content or not post_content.strip():
+        abort(400, message="Post content can't be empty!!")
+    check_address(user_address)
+    check_signature_shape(signed_message)
+    check_base64_image_shape(post_base64)
+
+
+def validate_register_shape(wallet_address, signed_message, username):
+    """
+    Cheap structural checks for /register-user, run before signature recovery.
+    """
+    if not username or not username.strip():
+        abort(400, message="Username cannot be empty !!")
+    check_address(wallet_address)
+    check_signature_shape(signed_message)
@@ -0,0 +1,100 @@
+import os
+import logging
+from web3 import Web3
+from app.services.metrics_service import track_dependency
+
+logger = logging.getLogger(__name__)
+
+BATCH_READ_CHUNK_SIZE = int(os.getenv("BATCH_READ_CHUNK_SIZE", "100"))
+
+USER_STATUS_FUNCTIONS = ("userToName", "isPostSubmitted", "getPostCid")
+
+
+class BatchReader:
+    """
+    Packs many contract view calls into JSON-RPC batch requests of eth_call,
+    split into chunks of BATCH_READ_CHUNK_SIZE calls per HTTP round-trip.
+    A call that reverts comes back as None instead of failing the whole batch.
+    """
+
+    def __init__(self, web3, contract_instance, chunk_size=BATCH_READ_CHUNK_SIZE):
+        self.web3 = web3
+        self.contract_instance = contract_instance
+        self.chunk_size = chunk_size
+
+    def _output_types(self, function_name):
+        function_abi = self.contract_instance.get_function_by_name(function_name).abi
+        return [output["type"] for output in function_abi["outputs"]]
+
+    def _decode(self, output_types, result):
+        if result is None:
+            return None
+        try:
+            values = self.web3.codec.decode(output_types, Web3.to_bytes(hexstr=result))
+        except Exception:
+            return None
+        return values[0] if len(values) == 1 else values
+
+    @track_dependency("rpc_batch_read")
+    def _call_chunk(self, requests):
+        try:
+            responses = self.web3.provider.make_batch_request(requests)
+            if isinstance(responses, list):
+                return [response.get("result") if "error" not in response else None for response in responses]
+            logger.warning("Batch eth_call rejected by provider: %s", responses.get("error"))
+        except NotImplementedError:
+            pass
+
+        # Provider can't batch: fall back to one eth_call per request
+        results = []
+        for _, params in requests:
+            try:
+                results.append(Web3.to_hex(self.web3.eth.call(*params)))
+            except Exception:
+                results.append(None)
+        return results
+
+    def call_many(self, calls):
+        """
+        calls is a list of (function_name, args) tuples.
+        Returns the decoded results in the same order.
+        """
+        contract_address = self.contract_instance.address
+        requests = [
+            ("eth_call", [{"to": contract_address, "data": self.contract_instance.encode_abi(function_name, args=list(args))}, "latest"])
+            for function_name, args in calls
+        ]
+        output_types = {function_name: self._output_types(function_name) for function_name, _ in calls}
+
+        results = []
+        for start in range(0, len(requests), self.chunk_size):
+            results.extend(self._call_chunk(requests[start:start + self.chunk_size]))
+
+        return [
+            self._decode(output_types[function_name], result)
+            for (function_name, _), result in zip(calls, results)
+        ]
+
+    def get_users_status(self, user_addresses):
+        """
+        Read userToName, isPostSubmitted and getPostCid for every address.
+        """
+        user_addresses = [Web3.to_checksum_address(user_address) for user_address in user_addresses]
+        calls = [
+            (function_name, (user_address,))
+            for user_address in user_addresses
+            for function_name in USER_STATUS_FUNCTIONS
+        ]
+        results = self.call_many(calls)
+
+        users_status = []
+        for index, user_address in enumerate(user_addresses):
+            username, is_post_submitted, post_cid = results[index * 3:index * 3 + 3]
+            users_status.append({
+                "user_address": user_address,
+                "username": username or None,
+                "is_registered": bool(username),
+                "is_post_submitted": bool(is_post_submitted),
+                "post_cid": post_cid or None,
+            })
+        return users_status
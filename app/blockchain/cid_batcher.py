@@ -0,0 +1,304 @@
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from web3 import Web3
+from web3.exceptions import ContractLogicError, TransactionNotFound
+from app.services.logging_service import bind_request_id
+from app.services.metrics_service import registry
+
+logger = logging.getLogger(__name__)
+
+CID_BATCH_ENABLED = os.getenv("CID_BATCH_ENABLED", "false").lower() == "true"
+CID_BATCH_WINDOW_SECONDS = float(os.getenv("CID_BATCH_WINDOW_SECONDS", "2"))
+CID_BATCH_MAX_SIZE = int(os.getenv("CID_BATCH_MAX_SIZE", "50"))
+# How long a request waits for its CID to be broadcast before answering without a tx hash
+CID_BATCH_SEND_TIMEOUT = float(os.getenv("CID_BATCH_SEND_TIMEOUT", "60"))
+CID_BATCH_MAX_TRACKED = int(os.getenv("CID_BATCH_MAX_TRACKED", "10000"))
+
+batch_sizes = registry.histogram(
+    "cid_batch_size", "CIDs committed per submit_cids transaction.", buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+batch_fallbacks = registry.counter(
+    "cid_batch_fallbacks_total", "Batches broadcast again, or whose CIDs were sent one by one instead.", ("reason",)
+)
+queued_cids = registry.gauge("cid_batch_queued", "Verified CIDs waiting for the next batch.")
+
+
+class CidBatcher:
+    """
+    Collects verified CIDs and commits them in one submit_cids transaction once
+    CID_BATCH_MAX_SIZE are waiting or the oldest has waited CID_BATCH_WINDOW_SECONDS.
+    When a batch would revert, or reverts once mined, its CIDs are sent one by one
+    with submit_cid, so one bad entry can't hold back the others.
+    A batch that seems dropped is broadcast again while its nonce is unused, since it
+    can still be mined; its CIDs are only resent once the nonce went to another
+    transaction, and never for users whose post is already on chain.
+    Each user's inclusion status is kept for /submissions/<user_address>.
+    """
+
+    def __init__(self, sender, contract, receipt_tracker, on_included=None, window=CID_BATCH_WINDOW_SECONDS,
+                 max_size=CID_BATCH_MAX_SIZE, max_tracked=CID_BATCH_MAX_TRACKED):
+        self.sender = sender
+        self.contract = contract
+        self.receipt_tracker = receipt_tracker
+        self.on_included = on_included
+        self.window = window
+        self.max_size = max_size
+        self.max_tracked = max_tracked
+        self._entries = OrderedDict()
+        self._sent_events = {}
+        self._pending = []
+        # Batches that reverted or were dropped, settled against the chain on the batcher thread
+        self._failed_batches = []
+        self._batch_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._thread = None
+
+    def submit(self, user_address, post_cid):
+        """
+        Queue a user's CID for the next batch and return its status entry.
+        A user whose CID is already queued, in flight or included gets that entry back.
+        """
+        user_address = Web3.to_checksum_address(user_address)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(user_address)
+            if entry and entry["status"] in ("queued", "sent", "included"):
+                return dict(entry)
+
+            entry = {
+                "user_address": user_address,
+                "post_cid": post_cid,
+                "status": "queued",
+                "mode": None,
+                "tx_hash": None,
+                "batch_id": None,
+                "batch_size": None,
+                "block_number": None,
+                "error": None,
+                "queued_at": now,
+                "updated_at": now,
+            }
+            self._entries[user_address] = entry
+            self._entries.move_to_end(user_address)
+            self._sent_events[user_address] = threading.Event()
+            self._pending.append(user_address)
+            queued_cids.inc()
+            self._trim()
+            self._has_work.notify()
+
+        self._ensure_started()
+        return dict(entry)
+
+    def wait_until_sent(self, user_address, timeout=CID_BATCH_SEND_TIMEOUT):
+        """
+        Block until the user's CID has been broadcast or has failed, and return its status entry.
+        The entry is still "queued" if that didn't happen within the timeout.
+        """
+        user_address = Web3.to_checksum_address(user_address)
+        with self._lock:
+            event = self._sent_events.get(user_address)
+        if event is not None:
+            event.wait(timeout)
+        return self.status(user_address)
+
+    def status(self, user_address):
+        with self._lock:
+            entry = self._entries.get(Web3.to_checksum_address(user_address))
+            return dict(entry) if entry else None
+
+    def _trim(self):
+        # Forget the oldest settled entries first; queued and in-flight ones are kept
+        if len(self._entries) <= self.max_tracked:
+            return
+        for user_address in list(self._entries.keys()):
+            if len(self._entries) <= self.max_tracked:
+                break
+            if self._entries[user_address]["status"] in ("included", "failed"):
+                del self._entries[user_address]
+                self._sent_events.pop(user_address, None)
+
+    def _update(self, user_addresses, **fields):
+        fields["updated_at"] = time.time()
+        with self._lock:
+            for user_address in user_addresses:
+                entry = self._entries.get(user_address)
+                if entry is not None:
+                    entry.update(fields)
+                    event = self._sent_events.get(user_address)
+                    if event is not None and fields.get("status") in ("sent", "failed"):
+                        event.set()
+                    elif event is not None and fields.get("status") == "queued":
+                        event.clear()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="cid-batcher", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        """
+        Wait for the next batch to send. Returns (items, failed_batch), items being (user_address, post_cid)
+        pairs, and failed_batch an earlier batch to settle instead, or None.
+        """
+        with self._lock:
+            while True:
+                if self._failed_batches:
+                    failed_batch = self._failed_batches.pop(0)
+                    return failed_batch["items"], failed_batch
+
+                if self._pending:
+                    oldest = self._entries[self._pending[0]]["queued_at"]
+                    wait_for = oldest + self.window - time.time()
+                    if len(self._pending) >= self.max_size or wait_for <= 0:
+                        batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+                        queued_cids.dec(amount=len(batch))
+                        return [(user_address, self._entries[user_address]["post_cid"]) for user_address in batch], None
+                    self._has_work.wait(wait_for)
+                else:
+                    self._has_work.wait()
+
+    def _run(self):
+        while True:
+            items, failed_batch = self._next_batch()
+            batch_id = failed_batch["batch_id"] if failed_batch is not None else next(self._batch_ids)
+            with bind_request_id(f"cid-batch-{batch_id}"):
+                if failed_batch is not None:
+                    try:
+                        self._settle_failed_batch(failed_batch)
+                    except Exception:
+                        # It may still be mined, so its CIDs aren't failed; the tracker hands it back later
+                        logger.exception("Could not settle CID batch %s, checking it again later", batch_id)
+                        self._track_batch(failed_batch)
+                    continue
+                try:
+                    if len(items) == 1:
+                        self._send_singly(items)
+                    else:
+                        self._send_batch(items, batch_id)
+                except Exception:
+                    logger.exception("CID batch %s failed", batch_id)
+                    self._update([user_address for user_address, _ in items], status="failed", error="Unexpected error")
+
+    def _send_batch(self, items, batch_id):
+        user_addresses = [user_address for user_address, _ in items]
+        post_cids = [post_cid for _, post_cid in items]
+        batch = {"items": items, "batch_id": batch_id}
+
+        def keep_signed(signed_txn, nonce):
+            batch.update(nonce=nonce, raw_transaction=signed_txn.raw_transaction)
+
+        try:
+            tx_hash = self.sender.send(self.contract.functions.submit_cids(user_addresses, post_cids), before_broadcast=keep_signed)
+        except ContractLogicError as err:
+            logger.warning("submit_cids for %d CIDs would revert, sending them one by one: %s", len(items), err)
+            batch_fallbacks.inc("would_revert")
+            self._send_singly(items)
+            return
+
+        batch_sizes.observe(value=len(items))
+        logger.info("Transaction sent", extra={"kind": "submit_cids", "tx_hash": tx_hash.hex(), "batch_size": len(items)})
+        self._update(user_addresses, status="sent", mode="batch", tx_hash=tx_hash.hex(), batch_id=batch_id, batch_size=len(items))
+        batch["tx_hash"] = tx_hash
+        self._track_batch(batch)
+
+    def _track_batch(self, batch):
+        self.receipt_tracker.track(
+            batch["tx_hash"],
+            kind="submit_cids",
+            on_confirmed=lambda receipt: self._included([user_address for user_address, _ in batch["items"]], receipt),
+            on_failed=lambda receipt: self._batch_failed(batch, receipt),
+        )
+
+    def _send_singly(self, items):
+        for user_address, post_cid in items:
+            try:
+                tx_hash = self.sender.send(self.contract.functions.submit_cid(user_address, post_cid))
+            except ContractLogicError as err:
+                logger.warning("submit_cid for %s reverted: %s", user_address, err)
+                self._update([user_address], status="failed", error="reverted")
+                continue
+            except Exception:
+                logger.exception("submit_cid for %s failed", user_address)
+                self._update([user_address], status="failed", error="Unexpected error")
+                continue
+
+            logger.info("Transaction sent", extra={"kind": "submit_cid", "tx_hash": tx_hash.hex()})
+            self._update([user_address], status="sent", mode="single", tx_hash=tx_hash.hex(), batch_id=None, batch_size=1)
+            self.receipt_tracker.track(
+                tx_hash,
+                kind="submit_cid",
+                on_confirmed=lambda receipt, user_address=user_address: self._included([user_address], receipt),
+                on_failed=lambda receipt, user_address=user_address: self._update([user_address], status="failed", error="reverted" if receipt else "dropped"),
+            )
+
+    def _included(self, user_addresses, receipt):
+        block_number = receipt["blockNumber"]
+        if isinstance(block_number, str):
+            block_number = int(block_number, 16)
+        self._update(user_addresses, status="included", block_number=block_number)
+        if self.on_included:
+            for user_address in user_addresses:
+                self.on_included(user_address)
+
+    def _batch_failed(self, batch, receipt):
+        # Called from the receipt tracker thread; the chain is checked on the batcher thread
+        batch["reverted"] = receipt is not None
+        with self._lock:
+            self._failed_batches.append(batch)
+            self._has_work.notify()
+
+    def _settle_failed_batch(self, batch):
+        """
+        Decide what to do with a batch that reverted or seemed dropped, from what the chain says.
+        """
+        items = batch["items"]
+        if not batch["reverted"]:
+            if self._owner_nonce() <= batch["nonce"]:
+                # Nothing used its nonce yet, so it can still be mined: broadcast it again, not its CIDs
+                logger.warning("CID batch %s not mined yet, broadcasting it again", batch["batch_id"])
+                batch_fallbacks.inc("rebroadcast")
+                try:
+                    self.sender.rebroadcast(batch["raw_transaction"])
+                except Exception as err:
+                    logger.warning("Rebroadcast of CID batch %s refused: %s", batch["batch_id"], err)
+                self._track_batch(batch)
+                return
+
+            receipt = self._receipt(batch["tx_hash"])
+            if receipt is not None and receipt["status"] == 1:
+                self._included([user_address for user_address, _ in items], receipt)
+                return
+
+        reason = "reverted" if batch["reverted"] else "dropped"
+        # Users can get in by another transaction meanwhile; only the rest are resent
+        unsent = []
+        for user_address, post_cid in items:
+            if self.contract.functions.isPostSubmitted(user_address).call():
+                self._update([user_address], status="included", error=None)
+                if self.on_included:
+                    self.on_included(user_address)
+            else:
+                unsent.append((user_address, post_cid))
+
+        logger.warning("CID batch %s %s, resending %d of its %d CIDs one by one", batch["batch_id"], reason, len(unsent), len(items))
+        batch_fallbacks.inc(reason)
+        self._update([user_address for user_address, _ in unsent], status="queued", mode=None, tx_hash=None, batch_id=None, batch_size=None)
+        self._send_singly(unsent)
+
+    def _owner_nonce(self):
+        return self.sender.web3.eth.get_transaction_count(self.sender.address, "latest")
+
+    def _receipt(self, tx_hash):
+        try:
+            return self.sender.web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
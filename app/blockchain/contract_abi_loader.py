@@ -1,4 +1,8 @@
+import os
 import json
 
-with open("app/blockchain/abi/linkedin_contract_abi.json") as f:
-    linkedin_contract_abi = json.load(f)
\ No newline at end of file
+# Resolved from this file, so the app can start from any working directory
+ABI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "abi")
+
+with open(os.path.join(ABI_DIR, "linkedin_contract_abi.json")) as f:
+    linkedin_contract_abi = json.load(f)
@@ -0,0 +1,224 @@
+import os
+import logging
+import time
+import sqlite3
+import threading
+from web3 import Web3
+from app.services.data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "false").lower() == "true"
+# One SQLite file per chain id and contract address is kept in this directory
+INDEXER_DB_DIR = data_path(os.getenv("INDEXER_DB_DIR", "contract_index"))
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", "0"))
+INDEXER_BLOCK_CHUNK = int(os.getenv("INDEXER_BLOCK_CHUNK", "2000"))
+# Blocks newer than this many below the head are left for a later sync
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "3"))
+# How far back to re-index when the checkpointed block was reorged away
+INDEXER_REORG_DEPTH = int(os.getenv("INDEXER_REORG_DEPTH", "64"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "15"))
+
+
+class EventIndexer:
+    """
+    Follows the UserRegistered, PostCidSubmitted and WinnerAnnounced events
+    into a local SQLite index, resuming from the last checkpointed block. Each sync only reads the
+    blocks mined since the previous one, stopping INDEXER_CONFIRMATIONS short of the head.
+    The checkpoint keeps its block hash; if the chain no longer has that block,
+    the last INDEXER_REORG_DEPTH blocks are dropped from the index and read again.
+    """
+
+    def __init__(self, web3, contract_instance, db_dir=INDEXER_DB_DIR, start_block=INDEXER_START_BLOCK,
+                 block_chunk=INDEXER_BLOCK_CHUNK, confirmations=INDEXER_CONFIRMATIONS, reorg_depth=INDEXER_REORG_DEPTH,
+                 poll_interval=INDEXER_POLL_INTERVAL):
+        self.web3 = web3
+        self.contract_instance = contract_instance
+        self.db_dir = db_dir
+        self.start_block = start_block
+        self.block_chunk = block_chunk
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.poll_interval = poll_interval
+        self.listeners = []
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread = None
+
+    def db_path(self):
+        # Keyed on the chain and contract, so pointing the app at a new deployment starts a fresh index
+        return os.path.join(self.db_dir, f"{self.web3.eth.chain_id}-{self.contract_instance.address.lower()}.sqlite3")
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(self.db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path(), check_same_thread=False)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    address TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    block_number INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS submissions (
+                    address TEXT PRIMARY KEY,
+                    cid TEXT NOT NULL,
+                    block_number INTEGER NOT NULL,
+                    log_index INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS winners (
+                    address TEXT NOT NULL,
+                    block_number INTEGER NOT NULL,
+                    tx_hash TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS checkpoint (
+                    name TEXT PRIMARY KEY,
+                    block_number INTEGER NOT NULL,
+                    block_hash TEXT
+                );
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _checkpoint(self):
+        with self._db_lock:
+            row = self._connection().execute("SELECT block_number, block_hash FROM checkpoint WHERE name = 'events'").fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def last_indexed_block(self):
+        return self._checkpoint()[0]
+
+    def _block_hash(self, block_number):
+        return Web3.to_hex(self.web3.eth.get_block(block_number)["hash"])
+
+    def _rewind_if_reorged(self, last_block, last_hash):
+        """
+        Drop the most recent indexed blocks when the checkpointed block is no longer on the chain.
+        Returns the block to resume after.
+        """
+        if last_block is None or last_hash is None or self._block_hash(last_block) == last_hash:
+            return last_block
+
+        rewind_to = max(self.start_block - 1, last_block - self.reorg_depth)
+        logger.warning("Block %s was reorged away, re-indexing from block %s", last_block, rewind_to + 1)
+        with self._db_lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM users WHERE block_number > ?", (rewind_to,))
+            conn.execute("DELETE FROM submissions WHERE block_number > ?", (rewind_to,))
+            conn.execute("DELETE FROM winners WHERE block_number > ?", (rewind_to,))
+            conn.execute("INSERT OR REPLACE INTO checkpoint (name, block_number, block_hash) VALUES ('events', ?, NULL)", (rewind_to,))
+            conn.commit()
+        return rewind_to
+
+    def sync_once(self, confirmations=None):
+        """
+        Index every event mined since the checkpoint. Returns the number of events applied.
+        confirmations overrides the instance's; pass 0 to index up to the head, e.g. for a one-shot read
+        that must not miss the latest blocks. Those may still be reorged, which the next sync repairs.
+        """
+        if confirmations is None:
+            confirmations = self.confirmations
+        with self._sync_lock:
+            last_block = self._rewind_if_reorged(*self._checkpoint())
+            from_block = self.start_block if last_block is None else last_block + 1
+            to_block = self.web3.eth.block_number - confirmations
+
+            applied = 0
+            while from_block <= to_block:
+                chunk_end = min(from_block + self.block_chunk - 1, to_block)
+                applied += self._index_range(from_block, chunk_end)
+                from_block = chunk_end + 1
+            return applied
+
+    def _index_range(self, from_block, to_block):
+        # Read before the logs, so a reorg while they are fetched is caught by the next sync
+        to_block_hash = self._block_hash(to_block)
+        events = self.contract_instance.events
+        registered = events.UserRegistered().get_logs(from_block=from_block, to_block=to_block)
+        submitted = events.PostCidSubmitted().get_logs(from_block=from_block, to_block=to_block)
+        winners = events.WinnerAnnounced().get_logs(from_block=from_block, to_block=to_block)
+
+        # UserRegistered does not carry the username, so read it once per new user
+        users = []
+        for event in registered:
+            user_address = Web3.to_checksum_address(event["args"]["user"])
+            username = self.contract_instance.functions.userToName(user_address).call()
+            users.append((user_address, username, event["blockNumber"]))
+
+        submissions = [
+            (Web3.to_checksum_address(event["args"]["submitter"]), event["args"]["postCid"], event["blockNumber"], event["logIndex"])
+            for event in submitted
+        ]
+        announced = [
+            (Web3.to_checksum_address(event["args"]["winner"]), event["blockNumber"], Web3.to_hex(event["transactionHash"]))
+            for event in winners
+        ]
+
+        with self._db_lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO users (address, username, block_number) VALUES (?, ?, ?)", users)
+            conn.executemany("INSERT OR REPLACE INTO submissions (address, cid, block_number, log_index) VALUES (?, ?, ?, ?)", submissions)
+            conn.executemany("INSERT OR REPLACE INTO winners (address, block_number, tx_hash) VALUES (?, ?, ?)", announced)
+            conn.execute("INSERT OR REPLACE INTO checkpoint (name, block_number, block_hash) VALUES ('events', ?, ?)", (to_block, to_block_hash))
+            conn.commit()
+
+        for listener in self.listeners:
+            try:
+                listener(users=users, submissions=submissions)
+            except Exception:
+                logger.exception("Event index listener failed")
+
+        return len(users) + len(submissions) + len(announced)
+
+    def get_username(self, user_address):
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT username FROM users WHERE address = ?", (Web3.to_checksum_address(user_address),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_post_submitted(self, user_address):
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM submissions WHERE address = ?", (Web3.to_checksum_address(user_address),)
+            ).fetchone()
+        return row is not None
+
+    def get_submitted_cids(self):
+        """
+        Same shape and order as the contract's getSubmittedCids(): a list of (address, cid).
+        """
+        with self._db_lock:
+            rows = self._connection().execute(
+                "SELECT address, cid FROM submissions ORDER BY block_number, log_index"
+            ).fetchall()
+        return [(address, cid) for address, cid in rows]
+
+    def get_announced_winner(self):
+        """
+        The most recently announced winner's address, or None while none has been indexed.
+        """
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT address FROM winners ORDER BY block_number DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="event-indexer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                applied = self.sync_once()
+                if applied:
+                    logger.info("Indexed %d contract events up to block %s", applied, self.last_indexed_block())
+            except Exception as err:
+                logger.warning("Event indexer sync failed: %s", err)
+            time.sleep(self.poll_interval)
@@ -0,0 +1,305 @@
+import os
+import time
+import logging
+import threading
+import statistics
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from web3.providers.base import JSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+RPC_LATENCY_WINDOW = int(os.getenv("RPC_LATENCY_WINDOW", "50"))
+RPC_FAILURE_THRESHOLD = int(os.getenv("RPC_FAILURE_THRESHOLD", "3"))
+RPC_BREAKER_COOLDOWN = float(os.getenv("RPC_BREAKER_COOLDOWN", "30"))
+RPC_HEALTH_CHECK_INTERVAL = float(os.getenv("RPC_HEALTH_CHECK_INTERVAL", "15"))
+# A node this many blocks behind the best one is treated as unhealthy
+RPC_MAX_BLOCK_LAG = int(os.getenv("RPC_MAX_BLOCK_LAG", "5"))
+RPC_POOL_CONNECTIONS = int(os.getenv("RPC_POOL_CONNECTIONS", "20"))
+
+# Sent to the primary endpoint, so the nonce the owner reads matches the node its transactions go to
+PRIMARY_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction", "eth_getTransactionCount"}
+# Never repeated on another endpoint once the first one may have received them
+SEND_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+# Answers that mean the node turned the request away without processing it
+UNPROCESSED_HTTP_STATUSES = {429, 503}
+# Rate limiting and server errors count against the endpoint; other RPC errors (reverts) don't
+RETRYABLE_HTTP_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+RATE_LIMIT_ERROR_CODES = {-32005, 429}
+
+
+class EndpointUnavailable(Exception):
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class AmbiguousSendError(ConnectionError):
+    """
+    A transaction send failed after the node may already have received it,
+    so it may or may not be in the mempool.
+    """
+
+
+class RPCEndpoint:
+    """
+    One RPC URL with its own keep-alive session, a rolling latency window and a circuit breaker.
+    The breaker opens after RPC_FAILURE_THRESHOLD consecutive failures, stays open for
+    RPC_BREAKER_COOLDOWN seconds, then lets a single trial request through (half-open).
+    """
+
+    def __init__(self, url, timeout, latency_window=RPC_LATENCY_WINDOW,
+                 failure_threshold=RPC_FAILURE_THRESHOLD, cooldown=RPC_BREAKER_COOLDOWN):
+        self.url = url
+        # RPC URLs often carry an API key in the path, so only scheme, host and port are logged
+        parts = urlsplit(url)
+        self.name = f"{parts.scheme}://{parts.netloc.rsplit('@', 1)[-1]}"
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latencies = deque(maxlen=latency_window)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.block_number = None
+        self.lagging = False
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_CONNECTIONS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def latency(self):
+        with self._lock:
+            # No samples yet: try it early so it gets measured
+            return statistics.median(self.latencies) if self.latencies else 0.0
+
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def available(self):
+        state = self.state()
+        if state == "closed":
+            return not self.lagging
+        if state == "half_open":
+            with self._lock:
+                return not self.trial_in_flight
+        return False
+
+    def acquire(self):
+        """
+        Claim the endpoint for a request; in half-open state only one caller gets through.
+        """
+        with self._lock:
+            if self.opened_at is not None and time.monotonic() - self.opened_at >= self.cooldown:
+                if self.trial_in_flight:
+                    return False
+                self.trial_in_flight = True
+            return True
+
+    def record_success(self, elapsed):
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+            if self.opened_at is not None:
+                logger.info("RPC endpoint %s recovered", self.name)
+            self.opened_at = None
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            was_trial = self.trial_in_flight
+            self.trial_in_flight = False
+            if was_trial or self.consecutive_failures >= self.failure_threshold:
+                if self.opened_at is None or was_trial:
+                    logger.warning("RPC endpoint %s ejected: %s", self.name, reason)
+                self.opened_at = time.monotonic()
+
+    def post(self, body):
+        response = self.session.post(
+            self.url, data=body, headers={"Content-Type": "application/json"}, timeout=self.timeout
+        )
+        if response.status_code in RETRYABLE_HTTP_STATUSES:
+            raise EndpointUnavailable(f"HTTP {response.status_code}", status=response.status_code)
+        response.raise_for_status()
+        return response.content
+
+    def stats(self):
+        return {
+            "endpoint": self.name,
+            "state": self.state(),
+            "lagging": self.lagging,
+            "latency_ms": round(self.latency() * 1000, 2),
+            "block_number": self.block_number,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+def _never_delivered(err):
+    """
+    Whether a failed request certainly never reached the node, or was refused before it was processed.
+    """
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(err, requests.exceptions.ConnectionError):
+        reason = err.args[0] if err.args else None
+        return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+    return isinstance(err, EndpointUnavailable) and err.status in UNPROCESSED_HTTP_STATUSES
+
+
+def _is_rate_limited(response):
+    responses = response if isinstance(response, list) else [response]
+    return any(
+        isinstance(item, dict) and (item.get("error") or {}).get("code") in RATE_LIMIT_ERROR_CODES
+        for item in responses
+    )
+
+
+class ProviderPool(JSONBaseProvider):
+    """
+    web3 provider over several RPC URLs. Reads go to the healthy endpoint with the
+    lowest median latency over its last RPC_LATENCY_WINDOW requests; transaction sends
+    and nonce reads go to the first healthy endpoint in the configured order.
+    A failed request moves on to the next endpoint, except a transaction send the
+    failed endpoint may have received, which raises AmbiguousSendError instead of
+    being broadcast twice. Endpoints that keep failing, or
+    fall more than RPC_MAX_BLOCK_LAG blocks behind, are ejected until they recover.
+    """
+
+    def __init__(self, urls, timeout=10, health_check_interval=RPC_HEALTH_CHECK_INTERVAL, max_block_lag=RPC_MAX_BLOCK_LAG, **endpoint_kwargs):
+        super().__init__()
+        if not urls:
+            raise ValueError("ProviderPool needs at least one RPC URL")
+        self.endpoints = [RPCEndpoint(url, timeout, **endpoint_kwargs) for url in urls]
+        self.health_check_interval = health_check_interval
+        self.max_block_lag = max_block_lag
+        self._health_thread = None
+        self._health_lock = threading.Lock()
+
+    def __str__(self):
+        return f"ProviderPool({', '.join(endpoint.name for endpoint in self.endpoints)})"
+
+    def _candidates(self, method):
+        available = [endpoint for endpoint in self.endpoints if endpoint.available()]
+        if method in PRIMARY_METHODS:
+            ordered = available
+        else:
+            ordered = sorted(available, key=lambda endpoint: endpoint.latency())
+        # Everything ejected: still try them, soonest to recover first, rather than fail outright
+        unavailable = [endpoint for endpoint in self.endpoints if endpoint not in available]
+        unavailable.sort(key=lambda endpoint: endpoint.opened_at or 0)
+        return ordered + unavailable
+
+    def _send(self, method, body):
+        self._ensure_health_checks()
+        last_error = None
+        for endpoint in self._candidates(method):
+            if not endpoint.acquire():
+                continue
+            started = time.perf_counter()
+            try:
+                raw_response = endpoint.post(body)
+                response = self.decode_rpc_response(raw_response)
+            except (requests.RequestException, EndpointUnavailable, ValueError) as err:
+                endpoint.record_failure(str(err))
+                last_error = err
+                if method in SEND_METHODS and not _never_delivered(err):
+                    raise AmbiguousSendError(f"{method} to {endpoint.name} failed after it may have been received: {err}") from err
+                continue
+
+            if _is_rate_limited(response):
+                endpoint.record_failure("rate limited")
+                last_error = EndpointUnavailable(f"{endpoint.name} rate limited")
+                continue
+
+            endpoint.record_success(time.perf_counter() - started)
+            return response
+
+        raise ConnectionError(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def make_request(self, method, params):
+        return self._send(method, self.encode_rpc_request(method, params))
+
+    def make_batch_request(self, requests):
+        method = requests[0][0] if requests else None
+        response = self._send(method, self.encode_batch_rpc_request(requests))
+        if isinstance(response, list):
+            return sorted(response, key=lambda item: item.get("id") if isinstance(item.get("id"), int) else 0)
+        return response
+
+    def is_connected(self, show_traceback=False):
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response
+
+    def check_health(self):
+        """
+        Probe every endpoint with eth_blockNumber, refreshing latency, breaker state and block lag.
+        """
+        body = self.encode_rpc_request("eth_blockNumber", [])
+        for endpoint in self.endpoints:
+            if endpoint.state() == "open":
+                continue
+            if not endpoint.acquire():
+                continue
+            started = time.perf_counter()
+            try:
+                response = self.decode_rpc_response(endpoint.post(body))
+                endpoint.block_number = int(response["result"], 16)
+            except Exception as err:
+                endpoint.record_failure(f"health check: {err}")
+                continue
+            endpoint.record_success(time.perf_counter() - started)
+
+        block_numbers = [endpoint.block_number for endpoint in self.endpoints if endpoint.block_number is not None]
+        if not block_numbers:
+            return
+        best_block = max(block_numbers)
+        for endpoint in self.endpoints:
+            lagging = endpoint.block_number is not None and best_block - endpoint.block_number > self.max_block_lag
+            if lagging and not endpoint.lagging:
+                logger.warning("RPC endpoint %s is %d blocks behind", endpoint.name, best_block - endpoint.block_number)
+            endpoint.lagging = lagging
+
+    def _ensure_health_checks(self):
+        # A single endpoint has nothing to fail over to
+        if len(self.endpoints) < 2 or not self.health_check_interval:
+            return
+        if self._health_thread and self._health_thread.is_alive():
+            return
+        with self._health_lock:
+            if self._health_thread and self._health_thread.is_alive():
+                return
+            self._health_thread = threading.Thread(target=self._run_health_checks, name="rpc-health-checks", daemon=True)
+            self._health_thread.start()
+
+    def _run_health_checks(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            try:
+                self.check_health()
+            except Exception as err:
+                logger.warning("RPC health check failed: %s", err)
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
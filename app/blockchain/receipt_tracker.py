@@ -0,0 +1,175 @@
+import os
+import logging
+import time
+import threading
+from collections import OrderedDict
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from app.services.logging_service import request_id_var, bind_request_id
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_POLL_INTERVAL = float(os.getenv("RECEIPT_POLL_INTERVAL", "3"))
+RECEIPT_BATCH_SIZE = int(os.getenv("RECEIPT_BATCH_SIZE", "50"))
+RECEIPT_TIMEOUT_SECONDS = float(os.getenv("RECEIPT_TIMEOUT_SECONDS", "600"))
+RECEIPT_MAX_TRACKED = int(os.getenv("RECEIPT_MAX_TRACKED", "10000"))
+
+
+def normalize_tx_hash(tx_hash):
+    if isinstance(tx_hash, (bytes, bytearray)):
+        return Web3.to_hex(tx_hash)
+    tx_hash = str(tx_hash).lower()
+    return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+
+
+class ReceiptTracker:
+    """
+    Tracks broadcast transactions in a background thread instead of blocking
+    a request on wait_for_transaction_receipt. Pending hashes are polled in
+    JSON-RPC batches and their final status is kept for the /tx endpoint.
+    """
+
+    def __init__(self, web3, poll_interval=RECEIPT_POLL_INTERVAL, batch_size=RECEIPT_BATCH_SIZE,
+                 timeout=RECEIPT_TIMEOUT_SECONDS, max_tracked=RECEIPT_MAX_TRACKED):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_tracked = max_tracked
+        self._transactions = OrderedDict()
+        self._callbacks = {}
+        self._failure_callbacks = {}
+        # Correlation id of the request that sent each transaction, for the confirmation log
+        self._request_ids = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def track(self, tx_hash, kind=None, on_confirmed=None, on_failed=None):
+        """
+        Start tracking a broadcast transaction. on_confirmed(receipt) is called
+        from the tracker thread once the transaction is mined successfully, and
+        on_failed(receipt) once it reverts, or with None when it is dropped.
+        """
+        tx_hash = normalize_tx_hash(tx_hash)
+        with self._lock:
+            self._transactions[tx_hash] = {
+                "tx_hash": tx_hash,
+                "kind": kind,
+                "status": "pending",
+                "block_number": None,
+                "submitted_at": time.time(),
+                "updated_at": time.time(),
+            }
+            if on_confirmed:
+                self._callbacks[tx_hash] = on_confirmed
+            if on_failed:
+                self._failure_callbacks[tx_hash] = on_failed
+            self._request_ids[tx_hash] = request_id_var.get()
+            self._trim()
+        self._ensure_started()
+        return tx_hash
+
+    def status(self, tx_hash):
+        with self._lock:
+            entry = self._transactions.get(normalize_tx_hash(tx_hash))
+            return dict(entry) if entry else None
+
+    def _trim(self):
+        # Forget the oldest finished transactions first; pending ones are kept
+        if len(self._transactions) <= self.max_tracked:
+            return
+        for tx_hash in list(self._transactions.keys()):
+            if len(self._transactions) <= self.max_tracked:
+                break
+            if self._transactions[tx_hash]["status"] != "pending":
+                del self._transactions[tx_hash]
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll_once()
+            except Exception as err:
+                logger.warning("Receipt tracker poll failed: %s", err)
+
+    def _pending_hashes(self):
+        with self._lock:
+            return [tx_hash for tx_hash, entry in self._transactions.items() if entry["status"] == "pending"]
+
+    def _fetch_receipts(self, tx_hashes):
+        """
+        Fetch raw receipts for a chunk of hashes in one JSON-RPC batch.
+        Falls back to one call per hash when the provider can't batch.
+        """
+        try:
+            responses = self.web3.provider.make_batch_request(
+                [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+            )
+            if isinstance(responses, list):
+                return {tx_hash: response.get("result") for tx_hash, response in zip(tx_hashes, responses)}
+        except NotImplementedError:
+            pass
+
+        receipts = {}
+        for tx_hash in tx_hashes:
+            try:
+                receipts[tx_hash] = self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipts[tx_hash] = None
+        return receipts
+
+    def poll_once(self):
+        pending = self._pending_hashes()
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            receipts = self._fetch_receipts(chunk)
+            for tx_hash in chunk:
+                self._record(tx_hash, receipts.get(tx_hash))
+
+    def _record(self, tx_hash, receipt):
+        now = time.time()
+        callback = None
+
+        with self._lock:
+            entry = self._transactions.get(tx_hash)
+            if entry is None:
+                return
+
+            if receipt is None:
+                if now - entry["submitted_at"] <= self.timeout:
+                    return
+                status, block_number = None, None
+                entry["status"] = "dropped"
+            else:
+                status = receipt["status"]
+                block_number = receipt["blockNumber"]
+                # Raw batch responses carry hex quantities
+                if isinstance(status, str):
+                    status = int(status, 16)
+                if isinstance(block_number, str):
+                    block_number = int(block_number, 16)
+                entry["status"] = "confirmed" if status == 1 else "failed"
+                entry["block_number"] = block_number
+
+            entry["updated_at"] = now
+            on_confirmed = self._callbacks.pop(tx_hash, None)
+            on_failed = self._failure_callbacks.pop(tx_hash, None)
+            callback = on_confirmed if status == 1 else on_failed
+            request_id = self._request_ids.pop(tx_hash, None)
+
+        with bind_request_id(request_id):
+            logger.info("Transaction %s %s in block %s", tx_hash, entry["status"], block_number, extra={"kind": entry.get("kind")})
+            if callback:
+                try:
+                    callback(receipt)
+                except Exception:
+                    logger.exception("Receipt callback failed for %s", tx_hash)
@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from app.services.metrics_service import track_dependency
+from .provider_pool import AmbiguousSendError
+
+logger = logging.getLogger(__name__)
+
+GAS_PRICE_TTL_SECONDS = float(os.getenv("GAS_PRICE_TTL_SECONDS", "15"))
+
+
+class NonceManager:
+    """
+    Process-wide nonce allocator for a single sending account.
+    The next nonce is read from the chain (including pending transactions) on first use
+    and again after any failed send, and handed out locally in between.
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self._next_nonce = None
+        self._lock = threading.Lock()
+
+    def _sync_locked(self):
+        self._next_nonce = self.web3.eth.get_transaction_count(self.address, "pending")
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+            return self._next_nonce
+
+    def reset(self):
+        """
+        Forget the local nonce, so the next allocation reads it from the chain again.
+        """
+        with self._lock:
+            self._next_nonce = None
+
+    @contextmanager
+    def next_nonce(self):
+        """
+        Hold the allocator lock and yield the next nonce.
+        The nonce is consumed only if the block completes; on error it is re-read from the chain.
+        """
+        with self._lock:
+            if self._next_nonce is None:
+                self._sync_locked()
+            try:
+                yield self._next_nonce
+            except Exception:
+                self._next_nonce = None
+                raise
+            self._next_nonce += 1
+
+
+class GasPriceOracle:
+    """
+    Caches web3.eth.gas_price for a short TTL so back-to-back transactions
+    do not each pay an extra RPC round-trip.
+    """
+
+    def __init__(self, web3, ttl=GAS_PRICE_TTL_SECONDS):
+        self.web3 = web3
+        self.ttl = ttl
+        self._gas_price = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._gas_price is None or time.monotonic() - self._fetched_at > self.ttl:
+                self._gas_price = self.web3.eth.gas_price
+                self._fetched_at = time.monotonic()
+            return self._gas_price
+
+    def invalidate(self):
+        with self._lock:
+            self._gas_price = None
+
+
+class OwnerTransactionSender:
+    """
+    Builds, signs and sends owner transactions back-to-back.
+    Gas is estimated outside the lock; the nonce is only assigned right before
+    signing, so a transaction that fails to build never leaves a nonce gap.
+    """
+
+    def __init__(self, web3, address, private_key):
+        self.web3 = web3
+        self.address = address
+        self.private_key = private_key
+        self.nonces = NonceManager(web3, address)
+        self.gas_prices = GasPriceOracle(web3)
+        self._chain_id = None
+
+    def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def send(self, contract_function, before_broadcast=None):
+        """
+        Send a contract function call from the owner account and return the transaction hash.
+        Errors from the node are re-raised after the local nonce is re-synced with the chain.
+        before_broadcast(signed_txn, nonce), if given, runs once the transaction is signed
+        and before it is sent, e.g. to persist it; if it raises, nothing is sent.
+        When the send fails after the node may have received it, the locally computed
+        hash is returned for the receipt tracker to settle, and the nonce is re-read.
+        """
+        # Building estimates gas against the node, so it is timed as its own stage
+        with track_dependency("rpc_build_transaction"):
+            txn = contract_function.build_transaction({
+                "from": self.address,
+                "gasPrice": self.gas_prices.get(),
+                "chainId": self.chain_id(),
+            })
+
+        ambiguous = None
+        try:
+            with self.nonces.next_nonce() as nonce:
+                txn["nonce"] = nonce
+                signed_txn = self.web3.eth.account.sign_transaction(txn, private_key=self.private_key)
+                if before_broadcast:
+                    before_broadcast(signed_txn, nonce)
+                try:
+                    with track_dependency("rpc_send_transaction"):
+                        tx_hash = self.web3.eth.send_raw_transaction(signed_txn.raw_transaction)
+                except AmbiguousSendError as err:
+                    ambiguous = err
+                    tx_hash = signed_txn.hash
+        except Exception:
+            self.gas_prices.invalidate()
+            raise
+
+        if ambiguous is not None:
+            logger.warning("Transaction %s may not have been broadcast: %s", tx_hash.hex(), ambiguous)
+            # The node's pending count tells whether it took the nonce
+            self.nonces.reset()
+
+        return tx_hash
+
+    def rebroadcast(self, raw_transaction):
+        """
+        Send an already signed owner transaction again and return its hash.
+        It may carry a nonce this process never handed out, so the local nonce is re-read afterwards.
+        """
+        try:
+            with track_dependency("rpc_send_transaction"):
+                return self.web3.eth.send_raw_transaction(raw_transaction)
+        finally:
+            self.nonces.reset()
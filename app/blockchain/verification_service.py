@@ -1,10 +1,39 @@
-from eth_account.messages import encode_defunct
-from .web3_instance import get_web3_instance, get_contract_instance
+import os
+import logging
+from functools import lru_cache
+from eth_account.messages import defunct_hash_message
+from eth_keys import keys
+from hexbytes import HexBytes
 from web3 import Web3 
 from flask_smorest import abort
 
-web3 = get_web3_instance()
-contract_instance = get_contract_instance()
+logger = logging.getLogger(__name__)
+
+SIGNATURE_CACHE_SIZE = int(os.getenv("SIGNATURE_CACHE_SIZE", "4096"))
+
+ORIGINAL_REGISTER_MESSAGE = "You are registering to LinkedInPost Reward Dapp !!  You agree with our terms and conditions."
+ORIGINAL_POST_SUBMIT_MESSAGE = "You are submiting your linkedin post screenshot and post content to LinkedInPost Reward Dapp !!"
+
+# The signed messages never change, so their EIP-191 digests are computed once
+REGISTER_MESSAGE_HASH = bytes(defunct_hash_message(text=ORIGINAL_REGISTER_MESSAGE))
+POST_SUBMIT_MESSAGE_HASH = bytes(defunct_hash_message(text=ORIGINAL_POST_SUBMIT_MESSAGE))
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def recover_signer(message_hash, signed_message):
+    """
+    Recover the signer address straight from a precomputed message digest.
+    Retries with the same signature are answered from the LRU cache.
+    """
+    signature = HexBytes(signed_message)
+    if len(signature) != 65:
+        raise ValueError("Signature must be 65 bytes long")
+
+    v = signature[64]
+    if v >= 27:
+        v -= 27
+    public_key = keys.Signature(signature_bytes=bytes(signature[:64]) + bytes([v])).recover_public_key_from_msg_hash(message_hash)
+    return public_key.to_checksum_address()
 
 def verify_register_data(wallet_address, signed_message, username):
 
@@ -22,13 +51,10 @@ def verify_register_data(wallet_address, signed_message, username):
         abort(400,
               message="Invalid wallet address!!")
     
-    ORIGINAL_REGISTER_MESSAGE = "You are registering to LinkedInPost Reward Dapp !!  You agree with our terms and conditions."
-
     try:
-        message = encode_defunct(text=ORIGINAL_REGISTER_MESSAGE)
-        signer_address = Web3().eth.account.recover_message(message, signature=signed_message)
+        signer_address = recover_signer(REGISTER_MESSAGE_HASH, signed_message.strip())
     except Exception as e:
-        print(e)
+        logger.info("Signature recovery failed: %s", e)
         abort(400,
               message="Invalid signed message")
     
@@ -60,13 +86,10 @@ def verify_post_submit_data(user_address, post_content, post_base64, signed_mess
             message="Post content can't be empty!!"
         )
 
-    ORIGINAL_POST_SUBMIT_MESSAGE = "You are submiting your linkedin post screenshot and post content to LinkedInPost Reward Dapp !!"
-
     try:
-        message = encode_defunct(text=ORIGINAL_POST_SUBMIT_MESSAGE)
-        signer_address = Web3().eth.account.recover_message(message, signature=signed_message)
+        signer_address = recover_signer(POST_SUBMIT_MESSAGE_HASH, signed_message.strip())
     except Exception as e:
-        print(e)
+        logger.info("Signature recovery failed: %s", e)
         abort(400,
               message="Invalid signed message")
     
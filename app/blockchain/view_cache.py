@@ -0,0 +1,158 @@
+import os
+import logging
+import time
+import threading
+from collections import OrderedDict
+from web3 import Web3
+from app.services.metrics_service import track_dependency
+
+logger = logging.getLogger(__name__)
+
+VIEW_CACHE_MAX_ITEMS = int(os.getenv("VIEW_CACHE_MAX_ITEMS", "50000"))
+VIEW_CACHE_TTL = float(os.getenv("VIEW_CACHE_TTL", "3600"))
+VIEW_CACHE_NEGATIVE_TTL = float(os.getenv("VIEW_CACHE_NEGATIVE_TTL", "15"))
+VIEW_CACHE_EVENT_POLL_INTERVAL = float(os.getenv("VIEW_CACHE_EVENT_POLL_INTERVAL", "15"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after a per-entry TTL.
+    """
+
+    def __init__(self, max_items=VIEW_CACHE_MAX_ITEMS):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class ContractViewCache:
+    """
+    Read-through cache for the userToName and isPostSubmitted view calls.
+    Positive answers never change on chain, so they are kept for VIEW_CACHE_TTL;
+    empty answers expire after VIEW_CACHE_NEGATIVE_TTL so a registration made
+    elsewhere shows up quickly. Contract events refresh entries in the background,
+    either from the local event index when one is given or by polling logs directly.
+    """
+
+    def __init__(self, web3, contract_instance, event_index=None):
+        self.web3 = web3
+        self.contract_instance = contract_instance
+        self.event_index = event_index
+        self.usernames = TTLCache()
+        self.submitted = TTLCache()
+        self._last_event_block = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        if event_index is not None:
+            event_index.listeners.append(self._apply_indexed_events)
+
+    def get_username(self, user_address):
+        user_address = Web3.to_checksum_address(user_address)
+        self._ensure_event_refresh()
+
+        username = self.usernames.get(user_address)
+        if username is _MISSING:
+            # The index may lag the chain, so only trust it for users it has already seen
+            username = self.event_index.get_username(user_address) if self.event_index else None
+            if not username:
+                with track_dependency("rpc_read"):
+                    username = self.contract_instance.functions.userToName(user_address).call()
+            self.usernames.set(user_address, username, VIEW_CACHE_TTL if username else VIEW_CACHE_NEGATIVE_TTL)
+        return username
+
+    def is_post_submitted(self, user_address):
+        user_address = Web3.to_checksum_address(user_address)
+        self._ensure_event_refresh()
+
+        submit_status = self.submitted.get(user_address)
+        if submit_status is _MISSING:
+            submit_status = self.event_index.is_post_submitted(user_address) if self.event_index else False
+            if not submit_status:
+                with track_dependency("rpc_read"):
+                    submit_status = self.contract_instance.functions.isPostSubmitted(user_address).call()
+            self.submitted.set(user_address, submit_status, VIEW_CACHE_TTL if submit_status else VIEW_CACHE_NEGATIVE_TTL)
+        return submit_status
+
+    def record_registration(self, user_address, username):
+        self.usernames.set(Web3.to_checksum_address(user_address), username, VIEW_CACHE_TTL)
+
+    def record_submission(self, user_address):
+        self.submitted.set(Web3.to_checksum_address(user_address), True, VIEW_CACHE_TTL)
+
+    def refresh_from_events(self):
+        """
+        Apply UserRegistered / PostCidSubmitted events mined since the last refresh.
+        """
+        latest_block = self.web3.eth.block_number
+        if self._last_event_block is None:
+            # Nothing is cached before the first refresh, so start from the head
+            self._last_event_block = latest_block
+            return
+        if latest_block <= self._last_event_block:
+            return
+
+        from_block = self._last_event_block + 1
+        events = self.contract_instance.events
+
+        for event in events.UserRegistered().get_logs(from_block=from_block, to_block=latest_block):
+            # The event does not carry the username, so drop the entry and let the next read fetch it
+            self.usernames.invalidate(Web3.to_checksum_address(event["args"]["user"]))
+
+        for event in events.PostCidSubmitted().get_logs(from_block=from_block, to_block=latest_block):
+            self.record_submission(event["args"]["submitter"])
+
+        self._last_event_block = latest_block
+
+    def _apply_indexed_events(self, users, submissions):
+        for user_address, username, _ in users:
+            self.record_registration(user_address, username)
+        for user_address, *_ in submissions:
+            self.record_submission(user_address)
+
+    def _ensure_event_refresh(self):
+        # The event index already pushes new events into this cache
+        if self.event_index is not None:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run_event_refresh, name="view-cache-events", daemon=True)
+            self._thread.start()
+
+    def _run_event_refresh(self):
+        while True:
+            try:
+                self.refresh_from_events()
+            except Exception as err:
+                logger.warning("View cache event refresh failed: %s", err)
+            time.sleep(VIEW_CACHE_EVENT_POLL_INTERVAL)
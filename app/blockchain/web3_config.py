@@ -7,4 +7,6 @@ LINKEDIN_CONTRACT_ADDRESS = os.getenv("LINKEDIN_CONTRACT_ADDRESS")
 OWNER_PUBLIC_ADDRESS = os.getenv("OWNER_PUBLIC_ADDRESS")
 OWNER_PRIVATE_KEY = os.getenv("OWNER_PRIVATE_KEY")
 WEB3_PROVIDER = os.getenv("ALCHEMY_PROVIDER")  
+# Comma-separated RPC URLs for the provider pool; defaults to the single ALCHEMY_PROVIDER
+WEB3_PROVIDERS = [url.strip() for url in os.getenv("WEB3_PROVIDERS", WEB3_PROVIDER or "").split(",") if url.strip()]
 PINATA_JWT = os.getenv("PINATA_JWT")
\ No newline at end of file
@@ -1,20 +1,49 @@
+import os
+import threading
 from web3 import Web3 
-from app.blockchain.web3_config import WEB3_PROVIDER, LINKEDIN_CONTRACT_ADDRESS
+from app.blockchain.web3_config import WEB3_PROVIDERS, LINKEDIN_CONTRACT_ADDRESS
 from .contract_abi_loader import linkedin_contract_abi
+from .provider_pool import ProviderPool
+
+WEB3_REQUEST_TIMEOUT = float(os.getenv("WEB3_REQUEST_TIMEOUT", "10"))
+
+_web3 = None
+_contract_instance = None
+_registry_lock = threading.Lock()
 
 
 def get_web3_instance():
-    web3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER))
+    """
+    The process-wide Web3 client over the WEB3_PROVIDERS pool. Creating it makes
+    no RPC call, so importing the app never waits on a provider; the first real request connects.
+    """
+    global _web3
+
+    if _web3 is None:
+        with _registry_lock:
+            if _web3 is None:
+                _web3 = Web3(ProviderPool(WEB3_PROVIDERS, timeout=WEB3_REQUEST_TIMEOUT))
 
-    if not web3.is_connected():
-        raise ConnectionError("Failed to connect to Ethereum provider")
-    
-    return web3
+    return _web3
 
 def get_contract_instance():
+    """
+    The contract bound to the shared Web3 client, built once.
+    """
+    global _contract_instance
+
+    if _contract_instance is None:
+        web3 = get_web3_instance()
+        with _registry_lock:
+            if _contract_instance is None:
+                _contract_instance = web3.eth.contract(address=Web3.to_checksum_address(LINKEDIN_CONTRACT_ADDRESS), abi=linkedin_contract_abi)
+
+    return _contract_instance
+
+def is_provider_connected():
 
-    web3 = get_web3_instance()
+    return get_web3_instance().is_connected()
 
-    contract_instance = web3.eth.contract(address=Web3.to_checksum_address(LINKEDIN_CONTRACT_ADDRESS), abi=linkedin_contract_abi)
+def get_provider_stats():
 
-    return contract_instance
\ No newline at end of file
+    return get_web3_instance().provider.stats()
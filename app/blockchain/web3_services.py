@@ -1,59 +1,83 @@
 from .web3_instance import get_web3_instance, get_contract_instance
-from .web3_config import OWNER_PRIVATE_KEY, OWNER_PUBLIC_ADDRESS, PINATA_JWT
-from flask import jsonify
+from .web3_config import OWNER_PRIVATE_KEY, OWNER_PUBLIC_ADDRESS
+from .tx_manager import OwnerTransactionSender
+from .receipt_tracker import ReceiptTracker
+from .view_cache import ContractViewCache
+from .event_indexer import EventIndexer, INDEXER_ENABLED
+from .batch_reads import BatchReader
+from .cid_batcher import CidBatcher, CID_BATCH_ENABLED
 from web3 import Web3
 from flask_smorest import abort
-from web3.exceptions import ContractLogicError
-import requests
+from web3.exceptions import ContractLogicError, TransactionNotFound
+import logging
 import os
-from requests.exceptions import RequestException, HTTPError, Timeout
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.services.pinning_service import get_pinning_backend, PinningError
+from app.services.post_cache import post_cache
+from app.services.metrics_service import track_dependency
+from app.services.logging_service import submit_with_context
+
+logger = logging.getLogger(__name__)
+
+PINATA_DOWNLOAD_CONCURRENCY = int(os.getenv("PINATA_DOWNLOAD_CONCURRENCY", "8"))
 
 web3 = get_web3_instance()
 contract_instance = get_contract_instance()
+owner_tx_sender = OwnerTransactionSender(web3, OWNER_PUBLIC_ADDRESS, OWNER_PRIVATE_KEY)
+receipt_tracker = ReceiptTracker(web3)
+event_indexer = EventIndexer(web3, contract_instance) if INDEXER_ENABLED else None
+view_cache = ContractViewCache(web3, contract_instance, event_index=event_indexer)
+batch_reader = BatchReader(web3, contract_instance)
+cid_batcher = CidBatcher(owner_tx_sender, contract_instance, receipt_tracker, on_included=view_cache.record_submission) if CID_BATCH_ENABLED else None
 
 def get_username(user_address):
 
-    username = contract_instance.functions.userToName(Web3.to_checksum_address(user_address)).call()
+    username = view_cache.get_username(user_address)
 
     return username
 
 def get_is_post_submitted(user_address):
 
-    submit_status = contract_instance.functions.isPostSubmitted(Web3.to_checksum_address(user_address)).call()
+    submit_status = view_cache.is_post_submitted(user_address)
 
     return submit_status
 
-def register_user(user_address, username):
+def get_users_status(user_addresses):
 
     try:
-        user_address = Web3.to_checksum_address(user_address)
-        txn = contract_instance.functions.register_user(user_address, username).build_transaction({
-        "from": OWNER_PUBLIC_ADDRESS,
-        "nonce": web3.eth.get_transaction_count(OWNER_PUBLIC_ADDRESS),
-        "gasPrice": web3.eth.gas_price 
-
-        })
-
-        signed_txn = web3.eth.account.sign_transaction(txn, private_key=OWNER_PRIVATE_KEY)
+        return batch_reader.get_users_status(user_addresses)
+    except Exception as e:
+        logger.exception("Batch user status read failed: %s", e)
+        abort(
+            500,
+            message="Unexpected error : failed!!"
+        )
 
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        print("Transaction sent:", tx_hash.hex())
+def register_user(user_address, username):
 
-        receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
-        print("Transaction mined in block", receipt.blockNumber)
+    try:
+        user_address = Web3.to_checksum_address(user_address)
+        tx_hash = owner_tx_sender.send(contract_instance.functions.register_user(user_address, username))
+        logger.info("Transaction sent", extra={"kind": "register_user", "tx_hash": tx_hash.hex()})
+
+        # Confirmation is tracked in the background, see /tx/<tx_hash>
+        receipt_tracker.track(
+            tx_hash,
+            kind="register_user",
+            on_confirmed=lambda receipt: view_cache.record_registration(user_address, username)
+        )
 
         return tx_hash.hex()
     except ContractLogicError as e:
         error_message = str(e)
-        print(error_message)
+        logger.warning("register_user reverted: %s", error_message)
         abort(
             400,
             message="Contract execution failed"
         )
 
     except Exception as e:
-        print(str(e))
+        logger.exception("register_user failed: %s", e)
         abort(
             500,
             message="Unexpected error : failed!!"
@@ -62,121 +86,144 @@ def register_user(user_address, username):
 
 def submit_user_cid(user_address, post_cid):
 
+    if cid_batcher is not None:
+        return submit_user_cid_batched(user_address, post_cid)
 
     try:
         user_address = Web3.to_checksum_address(user_address)
-        txn = contract_instance.functions.submit_cid(user_address, post_cid).build_transaction({
-        "from": OWNER_PUBLIC_ADDRESS,
-        "nonce": web3.eth.get_transaction_count(OWNER_PUBLIC_ADDRESS),
-        "gasPrice": web3.eth.gas_price 
+        tx_hash = owner_tx_sender.send(contract_instance.functions.submit_cid(user_address, post_cid))
+        logger.info("Transaction sent", extra={"kind": "submit_cid", "tx_hash": tx_hash.hex()})
 
-        })
-
-        signed_txn = web3.eth.account.sign_transaction(txn, private_key=OWNER_PRIVATE_KEY)
-
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        print("Transaction sent:", tx_hash.hex())
-
-        # receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
-        # print("Transaction mined in block", receipt.blockNumber)
+        receipt_tracker.track(
+            tx_hash,
+            kind="submit_cid",
+            on_confirmed=lambda receipt: view_cache.record_submission(user_address)
+        )
 
         return tx_hash.hex()
     except ContractLogicError as e:
         error_message = str(e).split(': ')[1]
-        print(error_message)
+        logger.warning("submit_cid reverted: %s", error_message)
         abort(
             400,
             message="Unable to submit post!!"
         )
 
     except Exception as e:
-        print(str(e))
+        logger.exception("submit_cid failed: %s", e)
         abort(
             500,
             message="Unable to submit post!!"
         )
 
-def download_private_json(cid, expires=100):
-    try:
-        file_url = f"https://{os.getenv('PINATA_GATEWAY_DOMAIN')}.mypinata.cloud/files/{cid}"
-        headers = {
-            "Authorization": PINATA_JWT,
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "url": file_url,
-            "expires": expires,
-            "date" : int(time.time()),
-            "method": "GET"
-        }
-
-        # Step 1: Get presigned download link
-        resp = requests.post(
-            os.getenv("PINATA_DOWNLOAD_URL"),
-            json=payload,
-            headers=headers,
-            timeout=10
+def submit_user_cid_batched(user_address, post_cid):
+    """
+    Queue the CID for the next submit_cids batch and wait until it has been broadcast.
+    Returns the hash of the transaction that carries it, or None if it is still queued
+    after CID_BATCH_SEND_TIMEOUT, which callers must report as pending, not submitted.
+    Calling it again for a queued CID waits for the same entry; /submissions/<user_address>
+    has its inclusion status.
+    """
+    entry = cid_batcher.submit(user_address, post_cid)
+    if entry["status"] == "queued":
+        entry = cid_batcher.wait_until_sent(user_address)
+
+    if entry["status"] == "failed":
+        logger.warning("Batched submit_cid failed: %s", entry["error"])
+        abort(
+            400 if entry["error"] == "reverted" else 500,
+            message="Unable to submit post!!"
         )
-        if not resp.ok:
-            print("🔴 Error from Pinata while generating presigned link:", resp.text)
-            abort(resp.status_code, message="Failed to get presigned download link from Pinata.")
 
+    if entry["status"] == "queued":
+        logger.warning("CID still queued after waiting for its batch", extra={"user_address": entry["user_address"]})
+
+    return entry["tx_hash"]
+
+
+def get_cid_submission_status(user_address):
 
-        presigned_url = resp.json().get("data")
-        if not presigned_url:
-            raise ValueError("Presigned URL not found in Pinata response")
+    return cid_batcher.status(user_address) if cid_batcher is not None else None
 
-        # Fetching content from presigned URL
-        file_resp = requests.get(presigned_url, timeout=10)
-        if not file_resp.ok:
-            print("🔴 Failed to download file:", file_resp.text)
-            abort(file_resp.status_code, message="Failed to download file from IPFS.")
 
-        return file_resp.json()
+@track_dependency("pinata_download")
+def download_private_json(cid, expires=100):
+    try:
+        return get_pinning_backend().fetch_json(cid, expires=expires)
 
-    except (HTTPError, RequestException, Timeout) as net_err:
-        print(f"🔴 Network error during file download: {net_err}")
+    except PinningError as net_err:
+        logger.error("Network error during file download: %s", net_err, extra={"cid": cid})
         raise RuntimeError("Failed to download file from IPFS: network error")
 
     except ValueError as ve:
-        print(f"🔴 Data format error: {ve}")
+        logger.error("Data format error: %s", ve, extra={"cid": cid})
         raise RuntimeError("Invalid response from Pinata service")
 
     except Exception as e:
-        print(f"❌ Unexpected error during IPFS download: {e}")
+        logger.exception("Unexpected error during IPFS download: %s", e, extra={"cid": cid})
         raise RuntimeError("Unknown error during IPFS download")
 
-def get_all_posts_data():
-
-    try:
-
-        submitted_data = contract_instance.functions.getSubmittedCids().call({'from': OWNER_PUBLIC_ADDRESS})
-
-        parsed_submitted_data = parse_submitted_cids(submitted_data=submitted_data)
-        if not parsed_submitted_data:
-            return ({ "submitted_posts" : "No posts submitted yet!" })
-        
-        user_adresses = list(parsed_submitted_data.keys())
-        for user_address in user_adresses:
-            cid = parsed_submitted_data[user_address]['post_cid']
-            post_json_data = download_private_json(cid=cid)
-            parsed_submitted_data[user_address].update(post_json_data)
-
-        return (parsed_submitted_data)
-    except ContractLogicError as err:
-        print(err)
-        abort(
-            400,
-            message="Contract execution failed"
-        )
-
-    except Exception as e:
-        print(str(e))
-        abort(
-            500,
-            message="Unexpected error : failed!!"
-        )
-    
+def iter_downloaded_posts(parsed_submitted_data, max_workers=PINATA_DOWNLOAD_CONCURRENCY):
+    """
+    Download every submitted post concurrently and yield
+    (user_address, post_json_data, error) as each download finishes.
+    Posts already in the local CID cache are yielded first without a download.
+    A failed CID yields its error message instead of aborting the others.
+    """
+    if not parsed_submitted_data:
+        return
+
+    pending = {}
+    for user_address, post_data in parsed_submitted_data.items():
+        cached_post = post_cache.get(post_data["post_cid"])
+        if cached_post is not None:
+            yield user_address, cached_post, None
+        else:
+            pending[user_address] = post_data["post_cid"]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Post cache stats", extra={"post_cache": post_cache.stats()})
+    if not pending:
+        return
+
+    workers = max(1, min(max_workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ipfs-download") as executor:
+        futures = {
+            submit_with_context(executor, download_private_json, cid=cid): user_address
+            for user_address, cid in pending.items()
+        }
+        for future in as_completed(futures):
+            user_address = futures[future]
+            try:
+                post_json_data = future.result()
+                post_cache.put(pending[user_address], post_json_data)
+                yield user_address, post_json_data, None
+            except Exception as err:
+                cid = parsed_submitted_data[user_address]["post_cid"]
+                logger.warning("Failed to download post %s for %s: %s", cid, user_address, err)
+                yield user_address, None, str(err)
+
+def get_submitted_cids(at_head=False):
+    """
+    Read the submitted (address, cid) list from the local event index after
+    catching it up with the chain, or from the contract when indexing is off or fails.
+    The index normally stops INDEXER_CONFIRMATIONS blocks short of the head; at_head
+    catches it up to the head, for snapshots that must include the latest submissions.
+    """
+    if event_indexer is not None:
+        try:
+            event_indexer.sync_once(confirmations=0 if at_head else None)
+            return event_indexer.get_submitted_cids()
+        except Exception as err:
+            logger.warning("Event index unavailable, reading submissions from chain: %s", err)
+
+    with track_dependency("rpc_read"):
+        return contract_instance.functions.getSubmittedCids().call({'from': OWNER_PUBLIC_ADDRESS})
+
+def start_event_indexer():
+
+    if event_indexer is not None:
+        event_indexer.start()
 
 def parse_submitted_cids(submitted_data):
 
@@ -194,34 +241,82 @@ def parse_submitted_cids(submitted_data):
     return parsed_data
 
 
-def announce_winner(winner_address):
+def announce_winner(winner_address, before_broadcast=None):
 
     try:
 
         winner_address = Web3.to_checksum_address(winner_address)
-        txn = contract_instance.functions.announce_winner(winner_address).build_transaction({
-        "from": OWNER_PUBLIC_ADDRESS,
-        "nonce": web3.eth.get_transaction_count(OWNER_PUBLIC_ADDRESS),
-        "gasPrice": web3.eth.gas_price 
-        })
-
-        signed_txn = web3.eth.account.sign_transaction(txn, private_key=OWNER_PRIVATE_KEY)
+        tx_hash = owner_tx_sender.send(contract_instance.functions.announce_winner(winner_address), before_broadcast=before_broadcast)
+        logger.info("Transaction sent", extra={"kind": "announce_winner", "tx_hash": tx_hash.hex()})
 
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        print("Transaction sent:", tx_hash.hex())
+        receipt_tracker.track(tx_hash, kind="announce_winner")
 
         return tx_hash.hex()
 
     except ContractLogicError as err:
-        print(err)
+        logger.warning("announce_winner reverted: %s", err)
         abort(
             400,
             message="Contract execution failed"
         )
 
     except Exception as e:
-        print(str(e))
+        logger.exception("announce_winner failed: %s", e)
         abort(
             500,
             message="Unexpected error : failed!!"
         )
+
+
+def resend_owner_transaction(raw_transaction, kind):
+    """
+    Broadcast an owner transaction signed earlier, unchanged, and track it again.
+    The node's error is raised if it refuses it (already mined, nonce used, ...).
+    """
+    tx_hash = owner_tx_sender.rebroadcast(raw_transaction)
+    logger.info("Transaction re-sent", extra={"kind": kind, "tx_hash": tx_hash.hex()})
+    receipt_tracker.track(tx_hash, kind=kind)
+    return tx_hash.hex()
+
+
+def get_announced_winner():
+    """
+    The winner recorded by the contract, or None while none has been announced.
+    Read from the event index, caught up to the head, or from the contract when indexing is off or fails.
+    """
+    if event_indexer is not None:
+        try:
+            event_indexer.sync_once(confirmations=0)
+            return event_indexer.get_announced_winner()
+        except Exception as err:
+            logger.warning("Event index unavailable, reading the winner from chain: %s", err)
+
+    with track_dependency("rpc_read"):
+        winner_address = contract_instance.functions.winner().call()
+    if not winner_address or int(winner_address, 16) == 0:
+        return None
+    return Web3.to_checksum_address(winner_address)
+
+
+def get_transaction_receipt(tx_hash):
+    """
+    The receipt of a mined transaction, or None while it is pending or unknown to the node.
+    """
+    try:
+        with track_dependency("rpc_read"):
+            return web3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+
+def get_owner_nonce():
+    """
+    Number of owner transactions mined so far, i.e. the lowest nonce not yet used on chain.
+    """
+    with track_dependency("rpc_read"):
+        return web3.eth.get_transaction_count(OWNER_PUBLIC_ADDRESS, "latest")
+
+
+def get_transaction_status(tx_hash):
+
+    return receipt_tracker.status(tx_hash)
@@ -0,0 +1,423 @@
+import os
+import logging
+import json
+import time
+import heapq
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from web3 import Web3
+from werkzeug.exceptions import HTTPException
+from app.services.scoring_service import rate_batch_and_store, batch_is_full, RATING_MAX_WORKERS
+from app.blockchain.web3_config import LINKEDIN_CONTRACT_ADDRESS
+from app.blockchain.web3_services import (
+    get_submitted_cids, parse_submitted_cids, iter_downloaded_posts, announce_winner,
+    resend_owner_transaction, get_announced_winner, get_transaction_receipt, get_owner_nonce
+)
+from app.services.data_dir import data_path
+from app.services.process_identity import process_id
+from app.services.logging_service import bind_request_id, submit_with_context
+
+logger = logging.getLogger(__name__)
+
+ANNOUNCEMENT_STATE_DIR = data_path(os.getenv("ANNOUNCEMENT_STATE_DIR", "announcements"))
+ANNOUNCEMENT_TOP_K = int(os.getenv("ANNOUNCEMENT_TOP_K", "5"))
+# A job whose owner hasn't renewed its lease for this long is taken over by another worker
+ANNOUNCEMENT_LEASE_SECONDS = float(os.getenv("ANNOUNCEMENT_LEASE_SECONDS", "60"))
+
+_job = None
+_job_lock = threading.Lock()
+
+
+def announcement_job_id():
+    """
+    The contract holds a single winner, so there is one announcement per contract.
+    """
+    return Web3.to_checksum_address(LINKEDIN_CONTRACT_ADDRESS).lower()
+
+
+class AnnouncementJob:
+    """
+    Rates submissions as they stream in from the downloader, keeps a running
+    top-k heap and checkpoints every rating to disk so a restart resumes
+    where it stopped. announce_winner is only called once every post is rated.
+
+    The submissions are snapshotted when the job is created; later ones are not part
+    of the announcement. The signed announce_winner transaction is checkpointed before
+    it is broadcast, and a resumed job settles that transaction against the chain
+    instead of sending a second one.
+
+    Only the process holding the job's lease works on it. The lease is claimed with a
+    conditional update in a SQLite table next to the checkpoints and renewed by a
+    heartbeat while the job runs; it is taken over only once its owner stopped renewing it.
+    The announce transaction is only signed while the lease is still held.
+    """
+
+    def __init__(self, job_id, state_dir=ANNOUNCEMENT_STATE_DIR, top_k=ANNOUNCEMENT_TOP_K, lease_seconds=ANNOUNCEMENT_LEASE_SECONDS):
+        self.job_id = job_id
+        self.path = os.path.join(state_dir, f"{job_id}.json")
+        self.lease_path = os.path.join(state_dir, "leases.sqlite3")
+        self.top_k = top_k
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._thread = None
+        self._heartbeat = None
+        self._stopped = threading.Event()
+        self._lease_lost = threading.Event()
+        self.reload()
+
+    def reload(self):
+        self._heap = []
+        self.state = self._load_state()
+        if self.state is not None:
+            self._load_submissions()
+
+    def _load_state(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_submissions(self):
+        self.parsed_submitted_data = parse_submitted_cids(submitted_data=self.state["submissions"])
+        self.order = {user_address: index for index, user_address in enumerate(self.parsed_submitted_data)}
+        for user_address, post_rating in self.state["ratings"].items():
+            self._push_rating(user_address, post_rating)
+
+    def create(self, parsed_submitted_data):
+        """
+        Start a new announcement over these submissions and checkpoint it.
+        """
+        self.state = {
+            "job_id": self.job_id,
+            "status": "pending",
+            "submissions": [[user_address, post_data["post_cid"]] for user_address, post_data in parsed_submitted_data.items()],
+            "total": len(parsed_submitted_data),
+            "ratings": {},
+            "failed_downloads": {},
+            "winner": None,
+            "announce_tx": None,
+            "txn_hash": None,
+            "error": None,
+            "started_at": time.time(),
+            "updated_at": time.time(),
+        }
+        self._load_submissions()
+        self._checkpoint()
+
+    def _checkpoint(self):
+        if self._lease_lost.is_set():
+            # Another process owns the job now, and its checkpoints are the ones that count
+            return
+        self.state["updated_at"] = time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def _push_rating(self, user_address, post_rating):
+        # Ties go to the earliest submission, like the sequential selection
+        entry = (post_rating, -self.order[user_address], user_address)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def _record_ratings(self, user_addresses, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            for user_address, post_rating in zip(user_addresses, future.result()):
+                self.state["ratings"][user_address] = post_rating
+                self._push_rating(user_address, post_rating)
+            self._checkpoint()
+
+    def _leaderboard(self):
+        return [
+            {"user_address": user_address, "rating": post_rating}
+            for post_rating, _, user_address in sorted(self._heap, reverse=True)
+        ]
+
+    def progress(self):
+        with self._lock:
+            if self.state is None:
+                # Another process claimed the job and hasn't checkpointed its snapshot yet
+                return {
+                    "job_id": self.job_id, "status": "pending", "total": None, "rated": 0, "failed_downloads": {},
+                    "leaderboard": [], "winner": None, "txn_hash": None, "error": None,
+                }
+            return {
+                "job_id": self.job_id,
+                "status": self.state["status"],
+                "total": self.state["total"],
+                "rated": len(self.state["ratings"]),
+                "failed_downloads": dict(self.state["failed_downloads"]),
+                "leaderboard": self._leaderboard(),
+                "winner": self.state["winner"],
+                "txn_hash": self.state["txn_hash"],
+                "error": self.state["error"],
+            }
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _update_leases(self, *statements):
+        """
+        Run (sql, params) statements against the lease table, each committed on its own.
+        Returns the last one's row count.
+        """
+        os.makedirs(os.path.dirname(self.lease_path), exist_ok=True)
+        # Other processes may hold the write lock for a moment
+        conn = sqlite3.connect(self.lease_path, timeout=30)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS announcement_leases (job_id TEXT PRIMARY KEY, owner TEXT, lease_expires_at REAL NOT NULL)"
+            )
+            rowcount = 0
+            for sql, params in statements:
+                rowcount = conn.execute(sql, params).rowcount
+                conn.commit()
+            return rowcount
+        finally:
+            conn.close()
+
+    def claim(self):
+        """
+        Take the job's lease unless another live process holds it, and reload the checkpoint under it.
+        Returns whether the lease was taken.
+        """
+        now = time.time()
+        claimed = self._update_leases(
+            ("INSERT OR IGNORE INTO announcement_leases (job_id, owner, lease_expires_at) VALUES (?, NULL, 0)", (self.job_id,)),
+            # Only one process's update matches a free or expired lease
+            (
+                "UPDATE announcement_leases SET owner = ?, lease_expires_at = ? "
+                "WHERE job_id = ? AND (owner IS NULL OR owner = ? OR lease_expires_at < ?)",
+                (process_id(), now + self.lease_seconds, self.job_id, process_id(), now),
+            ),
+        )
+        if claimed:
+            # Another process may have checkpointed since this job was loaded
+            self.reload()
+        return bool(claimed)
+
+    def _renew_lease(self):
+        return bool(self._update_leases((
+            "UPDATE announcement_leases SET lease_expires_at = ? WHERE job_id = ? AND owner = ?",
+            (time.time() + self.lease_seconds, self.job_id, process_id()),
+        )))
+
+    def release_lease(self):
+        self._update_leases((
+            "UPDATE announcement_leases SET owner = NULL, lease_expires_at = 0 WHERE job_id = ? AND owner = ?",
+            (self.job_id, process_id()),
+        ))
+
+    def _keep_lease(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self._renew_lease():
+                    logger.warning("Announcement job %s was taken over by another process", self.job_id)
+                    self._lease_lost.set()
+                    return
+            except Exception as err:
+                logger.warning("Could not renew the announcement job lease: %s", err)
+
+    def start(self):
+        """
+        Run or resume the job in a background thread, unless it has finished or is already running.
+        Only call it while holding the lease, see claim.
+        """
+        with self._lock:
+            if self.state["status"] == "finished" or self.is_running():
+                return
+            self.state["status"] = "running" if self.state["winner"] is None else "announcing"
+            self.state["error"] = None
+            self._checkpoint()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=f"announcement-{self.job_id}", daemon=True)
+            self._thread.start()
+            self._heartbeat = threading.Thread(target=self._keep_lease, name=f"announcement-{self.job_id}-lease", daemon=True)
+            self._heartbeat.start()
+
+    def _run(self):
+        with bind_request_id(f"announcement-{self.job_id}"):
+            try:
+                self._work()
+            finally:
+                self._stopped.set()
+                try:
+                    self.release_lease()
+                except Exception as err:
+                    logger.warning("Could not release the announcement job lease: %s", err)
+
+    def _work(self):
+        try:
+            if self.state["winner"] is None:
+                chain_winner = get_announced_winner()
+                if chain_winner is not None:
+                    logger.warning("The contract already has a winner, not rating", extra={"winner": chain_winner})
+                    self._finish(None, winner_address=chain_winner)
+                    return
+                self._rate_all()
+            self._announce()
+        except HTTPException as http_err:
+            self._fail((getattr(http_err, "data", None) or {}).get("message") or http_err.description)
+        except Exception as err:
+            self._fail(str(err))
+
+    def _fail(self, error):
+        logger.error("Announcement job %s failed: %s", self.job_id, error)
+        with self._lock:
+            self.state["status"] = "failed"
+            self.state["error"] = error
+            self._checkpoint()
+
+    def _rate_all(self):
+        pending = {
+            user_address: post_data
+            for user_address, post_data in self.parsed_submitted_data.items()
+            if user_address not in self.state["ratings"]
+        }
+        with self._lock:
+            self.state["failed_downloads"] = {}
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=RATING_MAX_WORKERS, thread_name_prefix="announcement-rating") as executor:
+
+            def submit_batch(batch):
+                user_addresses = [user_address for user_address, _ in batch]
+                future = submit_with_context(executor, rate_batch_and_store, [post_content for _, post_content in batch])
+                future.add_done_callback(lambda done: self._record_ratings(user_addresses, done))
+                futures.append(future)
+
+            batch = []
+            for user_address, post_json_data, error in iter_downloaded_posts(pending):
+                if error:
+                    with self._lock:
+                        self.state["failed_downloads"][user_address] = {
+                            "post_cid": pending[user_address]["post_cid"],
+                            "error": error
+                        }
+                    continue
+                batch.append((user_address, post_json_data.get("post_content")))
+                if batch_is_full([post_content for _, post_content in batch]):
+                    submit_batch(batch)
+                    batch = []
+            if batch:
+                submit_batch(batch)
+
+            wait(futures)
+
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+        with self._lock:
+            if not self._heap:
+                raise RuntimeError("No submitted post could be downloaded and rated.")
+            post_rating, _, user_address = max(self._heap)
+            self.state["winner"] = {"user_address": user_address, "rating": post_rating}
+            self.state["status"] = "announcing"
+            self._checkpoint()
+
+    def _record_signed(self, signed_txn, nonce):
+        # Runs before the broadcast: from here on a restart settles this transaction instead of signing another
+        with self._lock:
+            if self._lease_lost.is_set() or not self._renew_lease():
+                # Raising here keeps the transaction from being sent
+                self._lease_lost.set()
+                raise RuntimeError("Another process took over the announcement, not broadcasting")
+            self.state["announce_tx"] = {
+                "tx_hash": Web3.to_hex(signed_txn.hash),
+                "raw_transaction": Web3.to_hex(signed_txn.raw_transaction),
+                "nonce": nonce,
+            }
+            self._checkpoint()
+
+    def _announce(self):
+        announce_tx = self.state["announce_tx"]
+        if announce_tx is not None:
+            receipt = get_transaction_receipt(announce_tx["tx_hash"])
+            if receipt is not None and receipt["status"] == 1:
+                self._finish(announce_tx["tx_hash"])
+                return
+
+        chain_winner = get_announced_winner()
+        if chain_winner is not None:
+            # Announced already, by an earlier transaction or outside this service
+            logger.warning("The contract already has a winner, not announcing again", extra={"winner": chain_winner})
+            self._finish(None, winner_address=chain_winner)
+            return
+
+        if announce_tx is not None and (receipt is None or receipt["status"] != 0):
+            txn_hash = self._resend(announce_tx)
+            if txn_hash is not None:
+                self._finish(txn_hash)
+                return
+
+        txn_hash = announce_winner(winner_address=self.state["winner"]["user_address"], before_broadcast=self._record_signed)
+        self._finish(txn_hash)
+
+    def _resend(self, announce_tx):
+        """
+        Broadcast the checkpointed transaction again; the node either takes it or already has it.
+        Returns its hash, or None once its nonce was used by another transaction, so it can never be mined.
+        """
+        try:
+            return resend_owner_transaction(announce_tx["raw_transaction"], kind="announce_winner")
+        except Exception as err:
+            receipt = get_transaction_receipt(announce_tx["tx_hash"])
+            if receipt is not None:
+                if receipt["status"] == 1:
+                    return announce_tx["tx_hash"]
+                raise RuntimeError(f"announce_winner transaction {announce_tx['tx_hash']} reverted")
+            if get_owner_nonce() > announce_tx["nonce"]:
+                logger.warning("announce_winner transaction %s was replaced, sending a new one", announce_tx["tx_hash"])
+                return None
+            # Probably still pending; the next poll checks again
+            raise RuntimeError(f"announce_winner transaction {announce_tx['tx_hash']} is not settled yet: {err}")
+
+    def _finish(self, txn_hash, winner_address=None):
+        with self._lock:
+            if winner_address is not None and winner_address != (self.state["winner"] or {}).get("user_address"):
+                self.state["winner"] = {"user_address": winner_address, "rating": self.state["ratings"].get(winner_address)}
+            self.state["txn_hash"] = txn_hash
+            self.state["status"] = "finished"
+            self._checkpoint()
+        logger.info(
+            "Winner announced",
+            extra={"winner": self.state["winner"], "tx_hash": txn_hash}
+        )
+
+
+def start_or_resume_announcement():
+    """
+    Start the announcement, or resume it from its checkpoint. There is only one per
+    contract: once started, later calls report its progress and never start another.
+    Returns None when nothing has been submitted yet.
+    """
+    global _job
+
+    with _job_lock:
+        if _job is None or not _job.is_running():
+            # Reloaded from disk, so progress made by another process shows up too
+            job = AnnouncementJob(announcement_job_id())
+            if job.claim():
+                try:
+                    if job.state is None:
+                        # The snapshot is final, so it can't leave out posts mined in the last few blocks
+                        parsed_submitted_data = parse_submitted_cids(submitted_data=get_submitted_cids(at_head=True))
+                        if not parsed_submitted_data:
+                            return None
+                        job.create(parsed_submitted_data)
+                    job.start()
+                finally:
+                    # A job that isn't running here (finished, empty or failed to start) is left for any process
+                    if not job.is_running():
+                        job.release_lease()
+            _job = job
+
+    return _job.progress()
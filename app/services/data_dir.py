@@ -0,0 +1,13 @@
+import os
+
+# Resolved from this file, so local state lands in the same place whatever the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Every local store (ratings, caches, queues, indexes) lives under here; a relative DATA_DIR is taken from the project root
+DATA_DIR = os.path.join(PROJECT_ROOT, os.getenv("DATA_DIR", ".cache"))
+
+
+def data_path(path):
+    """
+    Absolute path of a local store: relative paths are placed under DATA_DIR, absolute ones are kept.
+    """
+    return os.path.join(DATA_DIR, path)
@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from app.services.data_dir import data_path
+
+FINGERPRINT_DB_PATH = data_path(os.getenv("FINGERPRINT_DB_PATH", "fingerprints.sqlite3"))
+FINGERPRINT_MAX_POSTS = int(os.getenv("FINGERPRINT_MAX_POSTS", "20000"))
+FINGERPRINT_MAX_VERDICTS = int(os.getenv("FINGERPRINT_MAX_VERDICTS", "20000"))
+FINGERPRINT_TEXT_SIMILARITY = float(os.getenv("FINGERPRINT_TEXT_SIMILARITY", "0.8"))
+# Out of IMAGE_HASH_SIZE ** 2 bits
+FINGERPRINT_IMAGE_DISTANCE = int(os.getenv("FINGERPRINT_IMAGE_DISTANCE", "12"))
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SHINGLE_SIZE = 3
+# Screenshots of posts share one layout, so a small hash sees most of them as the same picture
+IMAGE_HASH_SIZE = 16
+IMAGE_HASH_HEX_DIGITS = IMAGE_HASH_SIZE * IMAGE_HASH_SIZE // 4
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed permutation coefficients, so signatures stay comparable across restarts
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.sha256(f"minhash-a-{index}".encode()).digest()[:8], "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.sha256(f"minhash-b-{index}".encode()).digest()[:8], "big") % _MERSENNE_PRIME,
+    )
+    for index in range(MINHASH_PERMUTATIONS)
+]
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", (text or "").lower())).strip()
+
+
+def text_shingles(text):
+    words = normalize_text(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[index:index + SHINGLE_SIZE]) for index in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text):
+    shingle_hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+        for shingle in text_shingles(text)
+    ]
+    return [
+        min(((a * shingle_hash + b) % _MERSENNE_PRIME) & _MAX_HASH for shingle_hash in shingle_hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def minhash_similarity(signature, other_signature):
+    return sum(1 for left, right in zip(signature, other_signature) if left == right) / MINHASH_PERMUTATIONS
+
+
+def image_dhash(image, size=IMAGE_HASH_SIZE):
+    """
+    size * size bit difference hash of a PIL image; survives re-encoding and resizing.
+    """
+    pixels = list(image.convert("L").resize((size + 1, size)).getdata())
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            value = (value << 1) | (pixels[row * (size + 1) + column] > pixels[row * (size + 1) + column + 1])
+    return value
+
+
+def signature_bands(signature):
+    """
+    LSH bands of a MinHash signature; posts sharing any band are similarity candidates.
+    """
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [
+        f"{band}:" + ",".join(str(value) for value in signature[band * rows:(band + 1) * rows])
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+class PostFingerprint:
+
+    def __init__(self, post_content, image_sha256, image_hash=None):
+        self.content_sha256 = hashlib.sha256(normalize_text(post_content).encode("utf-8")).hexdigest()
+        self.image_sha256 = image_sha256
+        self.image_hash = image_hash
+        self.signature = minhash_signature(post_content)
+
+    def to_dict(self):
+        return {
+            "content_sha256": self.content_sha256,
+            "image_sha256": self.image_sha256,
+            "image_hash": self.image_hash,
+            "signature": self.signature,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        fingerprint = cls.__new__(cls)
+        fingerprint.content_sha256 = data["content_sha256"]
+        fingerprint.image_sha256 = data["image_sha256"]
+        fingerprint.image_hash = data["image_hash"]
+        fingerprint.signature = data["signature"]
+        return fingerprint
+
+    @property
+    def verdict_key(self):
+        return f"{self.image_sha256}:{self.content_sha256}"
+
+
+class FingerprintIndex:
+    """
+    Bounded, persisted index of submission fingerprints, checked before the
+    Gemini vision call. Exact repeats (same screenshot bytes and post text) get
+    their cached verdict back; posts whose text (MinHash/LSH) or screenshot
+    (difference hash) is close to another user's submitted post are flagged.
+    Posts are only recorded once their CID has been submitted.
+    """
+
+    def __init__(self, db_path=FINGERPRINT_DB_PATH, max_posts=FINGERPRINT_MAX_POSTS, max_verdicts=FINGERPRINT_MAX_VERDICTS):
+        self.db_path = db_path
+        self.max_posts = max_posts
+        self.max_verdicts = max_verdicts
+        self._verdicts = OrderedDict()
+        self._posts = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    verdict_key TEXT PRIMARY KEY,
+                    verdict TEXT NOT NULL,
+                    seq INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS posts (
+                    user_address TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    image_hash TEXT,
+                    seq INTEGER NOT NULL
+                );
+                """
+            )
+            conn.commit()
+            self._conn = conn
+            self._load()
+        return self._conn
+
+    def _load(self):
+        for verdict_key, verdict in self._conn.execute("SELECT verdict_key, verdict FROM verdicts ORDER BY seq"):
+            self._verdicts[verdict_key] = json.loads(verdict)
+        for user_address, signature, image_hash in self._conn.execute("SELECT user_address, signature, image_hash FROM posts ORDER BY seq"):
+            self._add_post(user_address, json.loads(signature), int(image_hash, 16) if image_hash else None)
+
+    def _next_seq(self, table):
+        row = self._conn.execute(f"SELECT COALESCE(MAX(seq), 0) + 1 FROM {table}").fetchone()
+        return row[0]
+
+    def _add_post(self, user_address, signature, image_hash):
+        self._remove_post(user_address)
+        bands = signature_bands(signature)
+        self._posts[user_address] = {"signature": signature, "image_hash": image_hash, "bands": bands}
+        for band in bands:
+            self._buckets.setdefault(band, set()).add(user_address)
+
+    def _remove_post(self, user_address):
+        post = self._posts.pop(user_address, None)
+        if not post:
+            return
+        for band in post["bands"]:
+            bucket = self._buckets.get(band)
+            if bucket:
+                bucket.discard(user_address)
+                if not bucket:
+                    del self._buckets[band]
+
+    def cached_verdict(self, fingerprint):
+        with self._lock:
+            self._connection()
+            verdict = self._verdicts.get(fingerprint.verdict_key)
+            if verdict is not None:
+                self._verdicts.move_to_end(fingerprint.verdict_key)
+            return verdict
+
+    def store_verdict(self, fingerprint, verdict):
+        with self._lock:
+            conn = self._connection()
+            self._verdicts[fingerprint.verdict_key] = verdict
+            self._verdicts.move_to_end(fingerprint.verdict_key)
+            conn.execute(
+                "INSERT OR REPLACE INTO verdicts (verdict_key, verdict, seq) VALUES (?, ?, ?)",
+                (fingerprint.verdict_key, json.dumps(verdict), self._next_seq("verdicts")),
+            )
+            while len(self._verdicts) > self.max_verdicts:
+                oldest_key, _ = self._verdicts.popitem(last=False)
+                conn.execute("DELETE FROM verdicts WHERE verdict_key = ?", (oldest_key,))
+            conn.commit()
+
+    def find_near_duplicates(self, fingerprint, exclude_user=None):
+        """
+        Other users' posts this one is close to, as {user_address: set of "post content" and/or "screenshot"}.
+        """
+        matches = {}
+        with self._lock:
+            self._connection()
+            candidates = set()
+            for band in signature_bands(fingerprint.signature):
+                candidates.update(self._buckets.get(band, ()))
+            candidates.discard(exclude_user)
+
+            for user_address in candidates:
+                if minhash_similarity(fingerprint.signature, self._posts[user_address]["signature"]) >= FINGERPRINT_TEXT_SIMILARITY:
+                    matches.setdefault(user_address, set()).add("post content")
+
+            if fingerprint.image_hash is not None:
+                for user_address, post in self._posts.items():
+                    if user_address == exclude_user or post["image_hash"] is None:
+                        continue
+                    if (fingerprint.image_hash ^ post["image_hash"]).bit_count() <= FINGERPRINT_IMAGE_DISTANCE:
+                        matches.setdefault(user_address, set()).add("screenshot")
+
+        return matches
+
+    def record_submission(self, user_address, fingerprint):
+        with self._lock:
+            conn = self._connection()
+            self._add_post(user_address, fingerprint.signature, fingerprint.image_hash)
+            conn.execute(
+                "INSERT OR REPLACE INTO posts (user_address, signature, image_hash, seq) VALUES (?, ?, ?, ?)",
+                (
+                    user_address,
+                    json.dumps(fingerprint.signature),
+                    f"{fingerprint.image_hash:0{IMAGE_HASH_HEX_DIGITS}x}" if fingerprint.image_hash is not None else None,
+                    self._next_seq("posts"),
+                ),
+            )
+            while len(self._posts) > self.max_posts:
+                oldest_user = next(iter(self._posts))
+                self._remove_post(oldest_user)
+                conn.execute("DELETE FROM posts WHERE user_address = ?", (oldest_user,))
+            conn.commit()
+
+
+fingerprint_index = FingerprintIndex()
@@ -0,0 +1,28 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Shared requests session so outbound calls to Pinata reuse
+    keep-alive connections instead of opening a new one per request.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
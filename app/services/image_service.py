@@ -0,0 +1,119 @@
+import logging
+import io
+import os
+import base64
+import hashlib
+import binascii
+import threading
+from PIL import Image
+from flask_smorest import abort
+from app.services.fingerprint_service import image_dhash
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(8 * 1024 * 1024)))
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+image_stats = {"processed": 0, "original_bytes": 0, "processed_bytes": 0}
+_stats_lock = threading.Lock()
+
+
+def detect_image_mime_type(image_bytes):
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if image_bytes.startswith(signature):
+            return mime_type
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_base64_image(post_base64):
+    """
+    Decode a base64 screenshot, accepting an optional data URL prefix.
+    """
+    if post_base64.startswith("data:") and "," in post_base64:
+        post_base64 = post_base64.split(",", 1)[1]
+
+    try:
+        return base64.b64decode(post_base64, validate=True)
+    except (binascii.Error, ValueError):
+        abort(400, message="Image is not valid base64 data.")
+
+
+def _record_sizes(original_bytes, processed_bytes):
+    with _stats_lock:
+        image_stats["processed"] += 1
+        image_stats["original_bytes"] += original_bytes
+        image_stats["processed_bytes"] += processed_bytes
+    logger.debug("Screenshot preprocessed: %d -> %d bytes", original_bytes, processed_bytes)
+
+
+def flatten_onto_white(image):
+    """
+    RGB copy of the image; transparent areas become white, not the black a plain convert("RGB") gives.
+    """
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode in ("RGBA", "LA", "PA"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def preprocess_screenshot(post_base64):
+    """
+    Decode the screenshot once, check its real format and size, downscale it to
+    IMAGE_MAX_DIMENSION and re-encode it compactly before it is sent to Gemini.
+    Returns {"data": base64 str, "bytes": the same image decoded, "mime_type": str,
+    "original_bytes": int, "processed_bytes": int, "sha256": hex digest of the uploaded bytes,
+    "image_hash": perceptual hash}.
+    """
+    image_bytes = decode_base64_image(post_base64)
+
+    if len(image_bytes) > IMAGE_MAX_UPLOAD_BYTES:
+        abort(413, message=f"Image is larger than {IMAGE_MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+    mime_type = detect_image_mime_type(image_bytes)
+    if not mime_type:
+        abort(400, message="Image must be a PNG, JPEG, WEBP or GIF screenshot.")
+
+    processed_bytes = image_bytes
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.load()
+            image_hash = image_dhash(image)
+            resized = max(image.size) > IMAGE_MAX_DIMENSION
+            if resized:
+                image.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION))
+
+            output = io.BytesIO()
+            flatten_onto_white(image).save(output, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        abort(400, message="Image could not be decoded.")
+
+    # Keep the original when re-encoding doesn't actually make it smaller
+    if resized or output.tell() < len(image_bytes):
+        processed_bytes = output.getvalue()
+        mime_type = "image/jpeg"
+
+    _record_sizes(len(image_bytes), len(processed_bytes))
+
+    return {
+        "data": base64.b64encode(processed_bytes).decode("ascii"),
+        "bytes": processed_bytes,
+        "mime_type": mime_type,
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(processed_bytes),
+        "sha256": hashlib.sha256(image_bytes).hexdigest(),
+        "image_hash": image_hash,
+    }
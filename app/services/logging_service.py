@@ -0,0 +1,200 @@
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one JSON object per line, "text" for a plain readable line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_MAX_RECORDS = int(os.getenv("LOG_QUEUE_MAX_RECORDS", "10000"))
+LOG_FIELD_MAX_CHARS = int(os.getenv("LOG_FIELD_MAX_CHARS", "256"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_listener = None
+_queue_handler = None
+_configure_lock = threading.Lock()
+
+
+def truncate(value, max_chars=LOG_FIELD_MAX_CHARS):
+    """
+    Cap a log field, so post content, model output or response bodies never land in the logs whole.
+    """
+    if not isinstance(value, str):
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            value = str(value)
+        else:
+            if not isinstance(value, (dict, list)):
+                return value
+            value = json.dumps(value, default=str)
+    if len(value) <= max_chars:
+        return value
+    return f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+
+
+def record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage()),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update({key: truncate(value) for key, value in record_fields(record).items()})
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={truncate(value)}" for key, value in fields.items())
+        return line
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp the current correlation id on the record in the thread that logged it.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without ever blocking the caller.
+    When the queue is full the record is dropped and counted instead.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback here, where the arguments are still current;
+        # unlike the default, keep the traceback out of the message field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT):
+    """
+    Route every `app.*` logger through a bounded queue to a single writer thread.
+    Safe to call more than once; only the first call installs the handlers.
+    """
+    global _listener, _queue_handler
+
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_MAX_RECORDS))
+        _queue_handler.addFilter(RequestIdFilter())
+
+        app_logger = logging.getLogger("app")
+        app_logger.setLevel(level)
+        app_logger.addHandler(_queue_handler)
+        app_logger.propagate = False
+
+        _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def dropped_log_records():
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+@contextmanager
+def bind_request_id(request_id):
+    """
+    Use the given correlation id for everything logged inside the block, e.g. by a background job.
+    """
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    executor.submit that carries the caller's correlation id into the worker thread.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def init_request_logging(app):
+    """
+    Give every request a correlation id, taken from the X-Request-ID header when
+    the caller sent one, and echo it back on the response.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        request_id = (request.headers.get(REQUEST_ID_HEADER) or "")[:64] or uuid.uuid4().hex
+        g.request_id_token = request_id_var.set(request_id)
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(error=None):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            request_id_var.reset(token)
+
+    return app
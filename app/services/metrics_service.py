@@ -0,0 +1,250 @@
+import logging
+import time
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "post_reward_"
+
+# Seconds; external calls here range from a cached RPC read to a slow vision call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), lock=None):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock or threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, lock=None):
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    series["buckets"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                cumulative = 0
+                for upper_bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.labelnames, labels, [("le", _format_value(float(upper_bound)))])
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{label_text} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+    Collectors are callables that return extra (name, kind, help, [(labels dict, value)])
+    entries computed at scrape time, for stats other modules already keep.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        for collector in collectors:
+            try:
+                collected = collector()
+            except Exception as err:
+                logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), err)
+                continue
+            for name, kind, documentation, samples in collected:
+                name = METRICS_PREFIX + name
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+dependency_latency = registry.histogram(
+    "dependency_call_seconds", "Latency of calls to external dependencies.", ("dependency",)
+)
+dependency_errors = registry.counter(
+    "dependency_errors_total", "Calls to external dependencies that raised an error.", ("dependency",)
+)
+dependency_in_flight = registry.gauge(
+    "dependency_calls_in_flight", "Calls to external dependencies currently running.", ("dependency",)
+)
+request_latency = registry.histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by endpoint.", ("endpoint", "method", "status")
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("endpoint",)
+)
+
+
+@contextmanager
+def track_dependency(dependency):
+    """
+    Time a call to an external dependency (Gemini, Pinata, the RPC node).
+    Usable as a context manager or a decorator; any exception counts as an error and is re-raised.
+    """
+    dependency_in_flight.inc(dependency)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        dependency_errors.inc(dependency)
+        raise
+    finally:
+        dependency_latency.observe(dependency, value=time.perf_counter() - started)
+        dependency_in_flight.dec(dependency)
+
+
+def instrument_app(app):
+    """
+    Record per-endpoint request latency and in-flight requests for a Flask app.
+    """
+    from flask import g, request
+
+    def _endpoint():
+        return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = _endpoint()
+        requests_in_flight.inc(g.metrics_endpoint)
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            request_latency.observe(g.metrics_endpoint, request.method, response.status_code, value=time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def _finish_request(error=None):
+        endpoint = g.pop("metrics_endpoint", None)
+        if endpoint is not None:
+            requests_in_flight.dec(endpoint)
+
+    return app
+
+
+def register_collector(collector):
+    return registry.register_collector(collector)
+
+
+def render_metrics():
+    return registry.render()
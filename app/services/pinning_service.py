@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import sqlite3
+import threading
+import requests
+from flask_smorest import abort
+from app.services.data_dir import data_path
+from app.services.http_session import get_http_session
+from app.services.metrics_service import track_dependency
+
+logger = logging.getLogger(__name__)
+
+# "pinata", or "local" to keep pinned files on disk (tests, benchmarks, offline runs)
+PINNING_BACKEND = os.getenv("PINNING_BACKEND", "pinata").lower()
+LOCAL_PIN_DIR = data_path(os.getenv("LOCAL_PIN_DIR", "pins"))
+PIN_UPLOAD_TIMEOUT = float(os.getenv("PIN_UPLOAD_TIMEOUT", "30"))
+PIN_MANIFEST_PATH = data_path(os.getenv("PIN_MANIFEST_PATH", "pin_manifest.sqlite3"))
+
+
+class PinningError(Exception):
+
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.status = status
+
+
+def raw_cid(content):
+    """
+    CIDv1 (raw codec, sha2-256) of content that fits in one block: what IPFS,
+    and Pinata's v3 uploads, give a small file.
+    """
+    digest = bytes([0x01, 0x55, 0x12, 0x20]) + hashlib.sha256(content).digest()
+    return "b" + base64.b32encode(digest).decode("ascii").lower().rstrip("=")
+
+
+class PinataBackend:
+    """
+    Pins to Pinata's private network over the shared keep-alive session.
+    """
+
+    def __init__(self, timeout=PIN_UPLOAD_TIMEOUT):
+        self.timeout = timeout
+
+    def _upload(self, name, files):
+        data = {
+            "network": "private",
+            "name": name,
+            "group_id": os.getenv("POST_DATA_PRIVATE_GROUP_ID"),
+            "keyvalues": "{}"
+        }
+        try:
+            with track_dependency("pinata_upload"):
+                response = get_http_session().post(
+                    os.getenv("PINATA_UPLOAD_URL"),
+                    headers={"Authorization": os.getenv("PINATA_JWT")},
+                    data=data,
+                    files=files,
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+            json_response = response.json()
+        except requests.exceptions.RequestException as e:
+            raise PinningError(f"Network error while uploading: {str(e)}", 502)
+        except ValueError:
+            raise PinningError("Invalid JSON response from Pinata", 500)
+
+        error = json_response.get("error")
+        if error:
+            raise PinningError(error.get("message", "Unknown error"), error.get("code", 500))
+
+        uploaded = json_response.get("data")
+        if not uploaded or not uploaded.get("cid"):
+            raise PinningError("Unexpected response format: CID not found", 500)
+        return uploaded["cid"]
+
+    def pin_file(self, name, content):
+        return self._upload(name, {"file": (f"{name}.json", content, "application/json")})
+
+    def fetch_json(self, reference, expires=100):
+        """
+        Download a private file by its CID.
+        """
+        file_url = f"https://{os.getenv('PINATA_GATEWAY_DOMAIN')}.mypinata.cloud/files/{reference}"
+        headers = {
+            "Authorization": os.getenv("PINATA_JWT"),
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "url": file_url,
+            "expires": expires,
+            "date" : int(time.time()),
+            "method": "GET"
+        }
+
+        # Step 1: Get presigned download link
+        session = get_http_session()
+        try:
+            resp = session.post(
+                os.getenv("PINATA_DOWNLOAD_URL"),
+                json=payload,
+                headers=headers,
+                timeout=10
+            )
+        except requests.exceptions.RequestException as e:
+            raise PinningError(f"Network error while requesting a download link: {str(e)}", 502)
+        if not resp.ok:
+            logger.error("Pinata refused the presigned link", extra={"cid": reference, "status": resp.status_code, "response_text": resp.text})
+            abort(resp.status_code, message="Failed to get presigned download link from Pinata.")
+
+        presigned_url = resp.json().get("data")
+        if not presigned_url:
+            raise ValueError("Presigned URL not found in Pinata response")
+
+        # Fetching content from presigned URL
+        try:
+            file_resp = session.get(presigned_url, timeout=10)
+        except requests.exceptions.RequestException as e:
+            raise PinningError(f"Network error while downloading: {str(e)}", 502)
+        if not file_resp.ok:
+            logger.error("Pinata file download failed", extra={"cid": reference, "status": file_resp.status_code, "response_text": file_resp.text})
+            abort(file_resp.status_code, message="Failed to download file from IPFS.")
+
+        return file_resp.json()
+
+
+class LocalPinningBackend:
+    """
+    Stand-in that keeps pinned files under a local directory. The CIDs match what
+    IPFS gives a small file with the same bytes.
+    """
+
+    def __init__(self, root_dir=LOCAL_PIN_DIR):
+        self.root_dir = root_dir
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def pin_file(self, name, content):
+        cid = raw_cid(content)
+        self._write(os.path.join(self.root_dir, cid), content)
+        return cid
+
+    def fetch_json(self, reference, expires=None):
+        path = os.path.normpath(os.path.join(self.root_dir, reference))
+        if not path.startswith(os.path.normpath(self.root_dir) + os.sep):
+            raise ValueError(f"Invalid pin reference {reference}")
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+
+
+class PinManifest:
+    """
+    Local record of the CID each user's post was pinned under.
+    """
+
+    def __init__(self, db_path=PIN_MANIFEST_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pin_manifest (
+                    user_key TEXT PRIMARY KEY,
+                    cid TEXT NOT NULL,
+                    pinned_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def put(self, user_key, cid):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pin_manifest (user_key, cid, pinned_at) VALUES (?, ?, ?)",
+                (user_key.lower(), cid, time.time()),
+            )
+            conn.commit()
+
+    def get(self, user_key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT cid, pinned_at FROM pin_manifest WHERE user_key = ?",
+                (user_key.lower(),),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("cid", "pinned_at"), row))
+
+
+_backend = None
+_manifest = None
+_registry_lock = threading.Lock()
+
+
+def get_pinning_backend():
+    global _backend
+
+    if _backend is None:
+        with _registry_lock:
+            if _backend is None:
+                _backend = LocalPinningBackend() if PINNING_BACKEND == "local" else PinataBackend()
+
+    return _backend
+
+
+def get_pin_manifest():
+    global _manifest
+
+    if _manifest is None:
+        with _registry_lock:
+            if _manifest is None:
+                _manifest = PinManifest()
+
+    return _manifest
+
+
+def pin_post_document(content, file_name, user_key=None):
+    """
+    Pin one post document and return its CID, the reference to submit on chain.
+    The pin is recorded in the manifest under user_key when one is given.
+    Raises PinningError when the upload fails.
+    """
+    cid = get_pinning_backend().pin_file(file_name, content)
+    if user_key:
+        get_pin_manifest().put(user_key, cid)
+    return cid
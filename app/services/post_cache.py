@@ -0,0 +1,120 @@
+import os
+import logging
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from app.services.data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+POST_CACHE_DIR = data_path(os.getenv("POST_CACHE_DIR", "posts"))
+POST_CACHE_MAX_BYTES = int(os.getenv("POST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+POST_CACHE_MEMORY_ITEMS = int(os.getenv("POST_CACHE_MEMORY_ITEMS", "1024"))
+
+
+class PostCache:
+    """
+    Content-addressed cache for pinned post JSON.
+    A CID never changes its content, so entries never go stale; they are only
+    evicted from disk (least recently used first) once the cache grows past max_bytes.
+    An in-memory LRU sits in front of the disk layer.
+    """
+
+    def __init__(self, cache_dir=POST_CACHE_DIR, max_bytes=POST_CACHE_MAX_BYTES, memory_items=POST_CACHE_MEMORY_ITEMS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, cid):
+        # Hash the CID so path-style CIDs (root/sub-path) map to a flat file name
+        file_name = hashlib.sha256(cid.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{file_name}.json")
+
+    def _remember(self, cid, data):
+        self._memory[cid] = data
+        self._memory.move_to_end(cid)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, cid):
+        with self._lock:
+            if cid in self._memory:
+                self._memory.move_to_end(cid)
+                self.hits += 1
+                return self._memory[cid]
+
+            path = self._path(cid)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                # Bump mtime so disk eviction is least-recently-used
+                os.utime(path)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(cid, data)
+            return data
+
+    def put(self, cid, data):
+        encoded = json.dumps(data).encode("utf-8")
+
+        with self._lock:
+            self._remember(cid, data)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._load_total_bytes()
+
+                path = self._path(cid)
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(encoded)
+                os.replace(tmp_path, path)
+
+                self._total_bytes += len(encoded) - previous_size
+                self._evict()
+            except OSError as err:
+                logger.warning("Post cache write failed for %s: %s", cid, err)
+
+    def _load_total_bytes(self):
+        if self._total_bytes is not None:
+            return
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json"))
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._total_bytes,
+            }
+
+
+post_cache = PostCache()
@@ -0,0 +1,10 @@
+import os
+import socket
+
+
+def process_id():
+    """
+    Identifies this worker process as the owner of a lease on shared local state.
+    Read at call time: workers forked from a preloaded app share the module but not the pid.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,94 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from app.services.data_dir import data_path
+
+RATING_STORE_PATH = data_path(os.getenv("RATING_STORE_PATH", "ratings.sqlite3"))
+
+
+def hash_post_content(post_content):
+    return hashlib.sha256((post_content or "").encode("utf-8")).hexdigest()
+
+
+class RatingStore:
+    """
+    Durable memo of Gemini ratings keyed by (content hash, model, prompt version).
+    Changing the model or the rating prompt produces a new key, and
+    purge_stale() drops rows written for any other model/prompt combination.
+    """
+
+    def __init__(self, db_path=RATING_STORE_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS post_ratings (
+                    content_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    rated_at REAL NOT NULL,
+                    PRIMARY KEY (content_hash, model, prompt_version)
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, post_content, model, prompt_version):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT score FROM post_ratings WHERE content_hash = ? AND model = ? AND prompt_version = ?",
+                (hash_post_content(post_content), str(model), prompt_version),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, post_content, model, prompt_version, score):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO post_ratings (content_hash, model, prompt_version, score, rated_at) VALUES (?, ?, ?, ?, ?)",
+                (hash_post_content(post_content), str(model), prompt_version, int(score), time.time()),
+            )
+            conn.commit()
+
+    def purge_stale(self, model, prompt_version):
+        """
+        Delete ratings produced by any other model or prompt version.
+        Returns the number of rows removed.
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "DELETE FROM post_ratings WHERE model != ? OR prompt_version != ?",
+                (str(model), prompt_version),
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def invalidate(self, post_content=None):
+        """
+        Drop the stored rating for one post, or every rating when no post is given.
+        """
+        with self._lock:
+            conn = self._connection()
+            if post_content is None:
+                cursor = conn.execute("DELETE FROM post_ratings")
+            else:
+                cursor = conn.execute("DELETE FROM post_ratings WHERE content_hash = ?", (hash_post_content(post_content),))
+            conn.commit()
+        return cursor.rowcount
+
+
+rating_store = RatingStore()
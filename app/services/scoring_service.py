@@ -0,0 +1,94 @@
+import os
+import logging
+import time
+from app.services.gemini_service import rate_post_content, rate_posts_batch, GEMINI_MODEL, RATING_PROMPT_VERSION
+from app.services.rating_store import rating_store
+
+logger = logging.getLogger(__name__)
+
+RATING_MAX_WORKERS = int(os.getenv("RATING_MAX_WORKERS", "8"))
+RATING_CALL_TIMEOUT = float(os.getenv("RATING_CALL_TIMEOUT", "60"))
+RATING_MAX_RETRIES = int(os.getenv("RATING_MAX_RETRIES", "2"))
+RATING_RETRY_BACKOFF = float(os.getenv("RATING_RETRY_BACKOFF", "1.0"))
+# Posts per batched rating request; 1 turns batching off
+RATING_BATCH_SIZE = int(os.getenv("RATING_BATCH_SIZE", "10"))
+# Rough cap on post text per batched request, counted as ~4 characters per token
+RATING_BATCH_TOKEN_BUDGET = int(os.getenv("RATING_BATCH_TOKEN_BUDGET", "8000"))
+
+
+def estimate_tokens(post_content):
+    return len(post_content or "") // 4 + 1
+
+
+def rate_with_retry(post_content, timeout=RATING_CALL_TIMEOUT, max_retries=RATING_MAX_RETRIES, backoff=RATING_RETRY_BACKOFF):
+    """
+    Rate a single post, retrying failed Gemini calls with exponential backoff.
+    The last error is re-raised once all retries are used up.
+    """
+    attempt = 0
+    while True:
+        try:
+            return rate_post_content(post_content=post_content, timeout=timeout)
+        except Exception as err:
+            if attempt >= max_retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning("Rating attempt %d failed (%s), retrying in %ss", attempt + 1, err, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+def rate_and_store(post_content):
+    """
+    Return the stored rating for this post if the same model and prompt already rated it,
+    otherwise rate it with Gemini and store the result.
+    """
+    stored_rating = rating_store.get(post_content, GEMINI_MODEL, RATING_PROMPT_VERSION)
+    if stored_rating is not None:
+        return stored_rating
+
+    post_rating = rate_with_retry(post_content)
+    rating_store.put(post_content, GEMINI_MODEL, RATING_PROMPT_VERSION, post_rating)
+    return post_rating
+
+
+def batch_is_full(post_contents, batch_size=RATING_BATCH_SIZE, token_budget=RATING_BATCH_TOKEN_BUDGET):
+    return len(post_contents) >= batch_size or sum(estimate_tokens(post_content) for post_content in post_contents) >= token_budget
+
+
+def rate_batch_and_store(post_contents):
+    """
+    Rate a batch of posts with one Gemini request, using stored ratings where possible.
+    Posts the batch response leaves out or gets wrong fall back to single-post rating.
+    Returns the scores in the same order as post_contents.
+    """
+    scores = [rating_store.get(post_content, GEMINI_MODEL, RATING_PROMPT_VERSION) for post_content in post_contents]
+    missing = [index for index, score in enumerate(scores) if score is None]
+
+    if len(missing) > 1:
+        try:
+            batch_scores = rate_posts_batch([post_contents[index] for index in missing], timeout=RATING_CALL_TIMEOUT)
+        except Exception as err:
+            logger.warning("Batch rating failed (%s), rating posts one by one", err, extra={"batch_size": len(missing)})
+            batch_scores = {}
+
+        for batch_index, index in enumerate(missing):
+            if batch_index in batch_scores:
+                scores[index] = batch_scores[batch_index]
+                rating_store.put(post_contents[index], GEMINI_MODEL, RATING_PROMPT_VERSION, scores[index])
+
+    for index, score in enumerate(scores):
+        if score is None:
+            scores[index] = rate_and_store(post_contents[index])
+
+    return scores
+
+
+def invalidate_stale_ratings():
+    """
+    Drop stored ratings produced by a different model or rating prompt.
+    """
+    removed = rating_store.purge_stale(GEMINI_MODEL, RATING_PROMPT_VERSION)
+    if removed:
+        logger.info("Removed %d stale stored ratings", removed)
+    return removed
@@ -0,0 +1,106 @@
+import os
+import io
+import re
+import logging
+from difflib import SequenceMatcher
+from PIL import Image
+from app.services.fingerprint_service import normalize_text
+from app.services.metrics_service import track_dependency
+
+try:
+    import pytesseract
+except ImportError:  # OCR is optional; without it every screenshot goes to Gemini
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+VERIFY_PREFILTER_ENABLED = os.getenv("VERIFY_PREFILTER_ENABLED", "true").lower() == "true"
+# Below this share of the post's words found in the screenshot, the post is rejected locally
+VERIFY_REJECT_BELOW = float(os.getenv("VERIFY_REJECT_BELOW", "0.2"))
+# At or above it, with LinkedIn UI and the "• You" marker read too, it may be approved locally
+VERIFY_APPROVE_ABOVE = float(os.getenv("VERIFY_APPROVE_ABOVE", "0.95"))
+VERIFY_LOCAL_APPROVE = os.getenv("VERIFY_LOCAL_APPROVE", "false").lower() == "true"
+# OCR output shorter than this is treated as unreadable rather than as a mismatch
+VERIFY_OCR_MIN_WORDS = int(os.getenv("VERIFY_OCR_MIN_WORDS", "8"))
+VERIFY_OCR_LANG = os.getenv("VERIFY_OCR_LANG", "eng")
+
+LINKEDIN_UI_WORDS = {"like", "comment", "repost", "send"}
+OWN_POST_MARKER = re.compile(r"[•·]\s*you\b", re.IGNORECASE)
+TRUNCATION_MARKER = re.compile(r"(…|\.\.\.)\s*(see\s+)?more\b", re.IGNORECASE)
+# Words only count as matched in runs of at least this many
+MATCH_MIN_RUN = 2
+
+
+def ocr_available():
+    return pytesseract is not None
+
+
+def ocr_screenshot_text(image_bytes):
+    """
+    Read the text in a screenshot with Tesseract. Returns None when OCR is unavailable or fails.
+    """
+    if not ocr_available():
+        return None
+    try:
+        with track_dependency("local_ocr"):
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                return pytesseract.image_to_string(image.convert("L"), lang=VERIFY_OCR_LANG)
+    except Exception as err:
+        logger.warning("OCR failed, escalating to the model: %s", err)
+        return None
+
+
+def text_match_ratio(post_content, screenshot_text):
+    """
+    Share of the post's words that appear, in order, in the screenshot text.
+    Profile names, reactions and other UI text around the post don't lower it,
+    and lone words matched out of context (stop words, mostly) don't raise it.
+    When the screenshot cuts the post off at "...see more", only the part up to
+    the last matched word counts. Posts shorter than VERIFY_OCR_MIN_WORDS can't
+    be scored this way; prefilter_screenshot leaves them to the model.
+    """
+    post_words = normalize_text(post_content).split()
+    if not post_words:
+        return 0.0
+    matcher = SequenceMatcher(None, post_words, normalize_text(screenshot_text).split(), autojunk=False)
+    blocks = [block for block in matcher.get_matching_blocks() if block.size >= MATCH_MIN_RUN]
+    if not blocks:
+        return 0.0
+
+    matched = sum(block.size for block in blocks)
+    visible = len(post_words)
+    if TRUNCATION_MARKER.search(screenshot_text):
+        visible = blocks[-1].a + blocks[-1].size
+    # A cut-off screenshot showing only a few of the post's words is no strong match
+    return matched / max(visible, VERIFY_OCR_MIN_WORDS)
+
+
+def prefilter_screenshot(post_content, screenshot):
+    """
+    Cheap local first tier of screenshot verification. Returns a dict with
+    "decision": "reject" for a clear mismatch, "approve" for a strong match
+    (only with VERIFY_LOCAL_APPROVE), or "escalate" to leave it to the model,
+    plus "similarity" (None when nothing could be read) and "reason".
+    """
+    if not VERIFY_PREFILTER_ENABLED or not ocr_available():
+        return {"decision": "escalate", "similarity": None, "reason": "prefilter unavailable"}
+
+    # Too few words to match in runs or to score against the minimum, so a short post is no evidence either way
+    if len(normalize_text(post_content).split()) < max(VERIFY_OCR_MIN_WORDS, MATCH_MIN_RUN):
+        return {"decision": "escalate", "similarity": None, "reason": "post too short"}
+
+    text = ocr_screenshot_text(screenshot["bytes"])
+    if not text or len(normalize_text(text).split()) < VERIFY_OCR_MIN_WORDS:
+        return {"decision": "escalate", "similarity": None, "reason": "no readable text"}
+
+    similarity = text_match_ratio(post_content, text)
+    if similarity < VERIFY_REJECT_BELOW:
+        return {"decision": "reject", "similarity": similarity, "reason": "text mismatch"}
+
+    if VERIFY_LOCAL_APPROVE and similarity >= VERIFY_APPROVE_ABOVE:
+        words = set(normalize_text(text).split())
+        # The model also checks the screenshot is LinkedIn and the submitter's own post
+        if len(words & LINKEDIN_UI_WORDS) >= 2 and OWN_POST_MARKER.search(text):
+            return {"decision": "approve", "similarity": similarity, "reason": "strong match"}
+
+    return {"decision": "escalate", "similarity": similarity, "reason": "ambiguous"}
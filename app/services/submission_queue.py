@@ -0,0 +1,287 @@
+import os
+import logging
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from werkzeug.exceptions import HTTPException
+from app.services.gemini_service import check_post_authenticity, record_submitted_post
+from app.services.fingerprint_service import PostFingerprint
+from app.services.ipfs_service import upload_post_and_get_cid
+from app.blockchain.web3_services import submit_user_cid, cid_batcher
+from app.services.data_dir import data_path
+from app.services.process_identity import process_id
+from app.services.logging_service import bind_request_id
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_QUEUE_PATH = data_path(os.getenv("SUBMISSION_QUEUE_PATH", "submission_queue.sqlite3"))
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", "4"))
+SUBMISSION_QUEUE_MAX_PENDING = int(os.getenv("SUBMISSION_QUEUE_MAX_PENDING", "200"))
+# A running job whose owner hasn't renewed its lease for this long is taken over by another worker
+SUBMISSION_LEASE_SECONDS = float(os.getenv("SUBMISSION_LEASE_SECONDS", "60"))
+
+SUBMISSION_STAGES = ("verify_screenshot", "upload_post", "submit_transaction")
+
+# Waiting jobs, and running jobs whose owner's lease has expired; takes the current time as its parameter
+CLAIMABLE = "(status = 'queued' OR (status = 'running' AND lease_expires_at < ?))"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class SubmissionQueue:
+    """
+    Local persistent queue for asynchronous /submit-post jobs.
+    Jobs are stored in SQLite and run stage by stage in background workers;
+    each finished stage is saved, so after a restart a job resumes at the
+    stage it was on. Enqueueing fails once SUBMISSION_QUEUE_MAX_PENDING jobs are waiting.
+
+    Several processes can share the database: a job is claimed with a conditional
+    update and held under a lease its owner keeps renewing. Only a job whose lease
+    has expired, because its owner stopped, is claimed again.
+    """
+
+    def __init__(self, db_path=SUBMISSION_QUEUE_PATH, workers=SUBMISSION_WORKERS, max_pending=SUBMISSION_QUEUE_MAX_PENDING, lease_seconds=SUBMISSION_LEASE_SECONDS):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._threads = []
+        self._lease_thread = None
+
+    def _connection(self):
+        # A connection opened before a fork can't be used by the child
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn_pid = os.getpid()
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Other processes may hold the write lock for a moment
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS submission_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    user_address TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT,
+                    stages TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    error TEXT,
+                    owner TEXT,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, user_address, post_content, post_base64, linkedin_username):
+        """
+        Queue a submission and return its job id. A user with a job still in
+        flight gets that job's id back instead of a second job.
+        """
+        now = time.time()
+        user_address = user_address.lower()
+        with self._lock:
+            conn = self._connection()
+            active = conn.execute(
+                "SELECT job_id FROM submission_jobs WHERE user_address = ? AND status IN ('queued', 'running')",
+                (user_address,),
+            ).fetchone()
+            if active:
+                return active["job_id"]
+
+            pending = conn.execute("SELECT COUNT(*) FROM submission_jobs WHERE status = 'queued'").fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} submissions are already waiting")
+
+            job_id = uuid.uuid4().hex
+            payload = {"post_content": post_content, "post_base64": post_base64, "linkedin_username": linkedin_username}
+            stages = {stage: {"status": "pending"} for stage in SUBMISSION_STAGES}
+            conn.execute(
+                "INSERT INTO submission_jobs (job_id, user_address, status, payload, stages, result, error, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, '{}', NULL, ?, ?)",
+                (job_id, user_address, json.dumps(payload), json.dumps(stages), now, now),
+            )
+            conn.commit()
+            self._has_work.notify()
+
+        self.start()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM submission_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["job_id"],
+            "user_address": row["user_address"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"]),
+            "result": json.loads(row["result"]),
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def has_pending_jobs(self):
+        """
+        Whether any job is waiting, including running jobs left behind by a process that stopped.
+        """
+        with self._lock:
+            return self._connection().execute(
+                f"SELECT 1 FROM submission_jobs WHERE {CLAIMABLE} LIMIT 1", (time.time(),)
+            ).fetchone() is not None
+
+    def start(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f"submission-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self._lease_thread is None or not self._lease_thread.is_alive():
+                self._lease_thread = threading.Thread(target=self._renew_leases, name="submission-leases", daemon=True)
+                self._lease_thread.start()
+
+    def _claim_next(self):
+        with self._lock:
+            conn = self._connection()
+            while True:
+                now = time.time()
+                candidates = conn.execute(
+                    f"SELECT * FROM submission_jobs WHERE {CLAIMABLE} ORDER BY created_at LIMIT ?", (now, self.workers + 1)
+                ).fetchall()
+                for row in candidates:
+                    # Another process may claim the same row in between; only one update matches it
+                    claimed = conn.execute(
+                        "UPDATE submission_jobs SET status = 'running', owner = ?, lease_expires_at = ?, updated_at = ? "
+                        f"WHERE job_id = ? AND {CLAIMABLE}",
+                        (process_id(), now + self.lease_seconds, now, row["job_id"], now),
+                    ).rowcount
+                    conn.commit()
+                    if claimed:
+                        if row["status"] == "running":
+                            logger.warning("Taking over submission job %s from %s after its lease expired", row["job_id"], row["owner"])
+                        return row
+                self._has_work.wait(timeout=5)
+
+    def _renew_leases(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self._lock:
+                    conn = self._connection()
+                    conn.execute(
+                        "UPDATE submission_jobs SET lease_expires_at = ? WHERE owner = ? AND status = 'running'",
+                        (time.time() + self.lease_seconds, process_id()),
+                    )
+                    conn.commit()
+            except Exception as err:
+                logger.warning("Could not renew submission job leases: %s", err)
+
+    def _save(self, job_id, **fields):
+        """
+        Update a job this process holds. Returns False when another worker has taken it over.
+        """
+        fields["updated_at"] = time.time()
+        for key in ("stages", "result", "payload"):
+            if fields.get(key) is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            conn = self._connection()
+            saved = conn.execute(
+                f"UPDATE submission_jobs SET {assignments} WHERE job_id = ? AND owner = ?", (*fields.values(), job_id, process_id())
+            ).rowcount
+            conn.commit()
+        return bool(saved)
+
+    def _work(self):
+        while True:
+            row = self._claim_next()
+            try:
+                with bind_request_id(f"job-{row['job_id']}"):
+                    self._run_job(row)
+            except Exception:
+                logger.exception("Submission worker crashed on job %s", row["job_id"])
+                self._save(row["job_id"], status="failed", error="Unexpected error while processing the submission.")
+
+    def _run_job(self, row):
+        job_id = row["job_id"]
+        user_address = row["user_address"]
+        payload = json.loads(row["payload"])
+        stages = json.loads(row["stages"])
+        result = json.loads(row["result"])
+
+        for stage in SUBMISSION_STAGES:
+            if stages[stage]["status"] == "done":
+                continue
+
+            stages[stage] = {"status": "running", "started_at": time.time()}
+            if not self._save(job_id, stages=stages):
+                logger.warning("Submission job %s was taken over by another worker, stopping", job_id)
+                return
+            try:
+                result.update(run_submission_stage(stage, user_address, payload, result))
+            except HTTPException as http_err:
+                message = (getattr(http_err, "data", None) or {}).get("message") or http_err.description
+                stages[stage].update(status="failed", finished_at=time.time(), error=message, code=http_err.code)
+                self._save(job_id, status="failed", stages=stages, payload=None, error=message)
+                return
+            except Exception:
+                logger.exception("Submission job %s failed at %s", job_id, stage)
+                stages[stage].update(status="failed", finished_at=time.time(), error="Unexpected error")
+                self._save(job_id, status="failed", stages=stages, payload=None, error="Error submitting the post.")
+                return
+
+            stages[stage].update(status="done", finished_at=time.time())
+            self._save(job_id, stages=stages, result=result, payload=payload)
+
+        # The screenshot is no longer needed once the job has finished
+        self._save(job_id, status="finished", payload=None)
+
+
+def run_submission_stage(stage, user_address, payload, result):
+    """
+    Run one stage of the submit-post pipeline and return the values it adds to the job result.
+    Values later stages need but the user shouldn't see go in the payload instead.
+    """
+    if stage == "verify_screenshot":
+        post_fingerprint = check_post_authenticity(post_content=payload["post_content"], post_base64=payload["post_base64"], user_address=user_address)
+        payload["fingerprint"] = post_fingerprint.to_dict()
+        return {}
+
+    if stage == "upload_post":
+        cid = upload_post_and_get_cid(post_content=payload["post_content"], linkedin_username=payload["linkedin_username"], user_address=user_address)
+        return {"upload_cid": cid, "linkedin_username": payload["linkedin_username"]}
+
+    if stage == "submit_transaction":
+        # A batched CID is only held in memory until its batch is sent, so the job waits for that;
+        # if the process stops first, the job is picked up again at this stage
+        tx_hash = submit_user_cid(user_address=user_address, post_cid=result["upload_cid"])
+        while tx_hash is None:
+            tx_hash = submit_user_cid(user_address=user_address, post_cid=result["upload_cid"])
+        stage_result = {"tx_hash": tx_hash}
+        if cid_batcher is not None:
+            stage_result["inclusion_status_url"] = f"/submissions/{user_address}"
+        record_submitted_post(user_address, PostFingerprint.from_dict(payload["fingerprint"]))
+        return stage_result
+
+    raise ValueError(f"Unknown submission stage {stage}")
+
+
+submission_queue = SubmissionQueue()
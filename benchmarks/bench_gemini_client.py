@@ -0,0 +1,74 @@
+"""
+Per-call overhead of building a Gemini client for every request versus
+reusing the shared client, measured against a local fake model.
+
+    python -m benchmarks.bench_gemini_client --calls 200
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes.fake_gemini import start_fake_gemini
+
+
+def _timed_calls(rate_once, calls):
+    timings = []
+    for index in range(calls):
+        started = time.perf_counter()
+        rate_once(f"Benchmark post number {index}")
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(timings) * 1000:7.2f} ms   p50 {statistics.median(timings) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_gemini(latency=args.latency)
+    os.environ.update({"GEMINI_API_KEY": "benchmark", "GEMINI_MODEL": "fake-model", "GEMINI_BASE_URL": base_url})
+
+    from google import genai
+    from flask import json
+    from app.services import gemini_service
+
+    def rate_with_new_client(post_content):
+        # Previous behaviour: a client and schema class per call
+        class PostRating(gemini_service.BaseModel):
+            overall_score: int
+
+        client = genai.Client(api_key="benchmark", http_options={"base_url": base_url})
+        response = client.models.generate_content(
+            model="fake-model",
+            contents=[gemini_service.RATING_PROMPT_TEMPLATE.format(post_content=post_content)],
+            config={"response_mime_type": "application/json", "response_schema": PostRating},
+        )
+        return int(json.loads(response.text)["overall_score"])
+
+    def rate_with_shared_client(post_content):
+        return gemini_service.rate_post_content(post_content=post_content)
+
+    # Warm up both paths so import costs are not counted
+    rate_with_new_client("warm up")
+    rate_with_shared_client("warm up")
+
+    print(f"{args.calls} rating calls against fake Gemini at {base_url}")
+    _report("client per call", _timed_calls(rate_with_new_client, args.calls))
+    _report("shared client", _timed_calls(rate_with_shared_client, args.calls))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
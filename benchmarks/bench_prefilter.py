@@ -0,0 +1,122 @@
+"""
+Local text-match tier of screenshot verification, on simulated OCR output: the
+post text wrapped in LinkedIn UI text, with OCR-like character errors, some
+posts cut off at "...see more", and mismatched screenshots showing another post.
+Reports the similarity spread per case, how many screenshots each threshold
+setting keeps away from Gemini, wrong local verdicts, and the time per match.
+
+    python -m benchmarks.bench_prefilter --posts 500 --noise 0.03
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from app.services.screenshot_prefilter import text_match_ratio, VERIFY_REJECT_BELOW, VERIFY_APPROVE_ABOVE
+
+WORDS = (
+    "launch team growth hiring product customers learning leadership design data engineering "
+    "milestone community feedback mentor career startup remote culture release scale impact "
+    "story lesson failure success weekly thanks network conference talk workshop open source "
+    "the a to and of we our this my for with on in it is was"
+).split()
+
+# Characters Tesseract commonly confuses
+OCR_CONFUSIONS = {"l": "1", "o": "0", "i": "l", "e": "c", "rn": "m", "s": "5", "a": "o"}
+
+
+def make_post(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def ocr_noise(text, rng, rate):
+    out = []
+    index = 0
+    while index < len(text):
+        pair = text[index:index + 2]
+        if pair in OCR_CONFUSIONS and rng.random() < rate:
+            out.append(OCR_CONFUSIONS[pair])
+            index += 2
+            continue
+        char = text[index]
+        if char in OCR_CONFUSIONS and rng.random() < rate:
+            out.append(OCR_CONFUSIONS[char])
+        elif char == " " and rng.random() < rate / 2:
+            out.append("\n")
+        else:
+            out.append(char)
+        index += 1
+    return "".join(out)
+
+
+def screenshot_text(body, rng, noise):
+    return ocr_noise(
+        f"Jane Doe • You\nProduct at Example Co\n{rng.randint(1, 23)}h • Edited\n{body}\n"
+        f"{rng.randint(1, 500)} reactions {rng.randint(0, 80)} comments\nLike Comment Repost Send",
+        rng, noise,
+    )
+
+
+def make_cases(count, noise, seed):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        post = make_post(rng, rng.randint(40, 200))
+        kind = rng.choices(["match", "truncated", "mismatch"], weights=[6, 2, 2])[0]
+        if kind == "match":
+            body = post
+        elif kind == "truncated":
+            words = post.split()
+            body = " ".join(words[:max(12, len(words) // 3)]) + " ...see more"
+        else:
+            body = make_post(rng, rng.randint(40, 200))
+        cases.append((kind, post, screenshot_text(body, rng, noise)))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.03, help="OCR character error rate")
+    parser.add_argument("--reject-below", type=float, default=VERIFY_REJECT_BELOW)
+    parser.add_argument("--approve-above", type=float, default=VERIFY_APPROVE_ABOVE)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cases = make_cases(args.posts, args.noise, args.seed)
+    scores = {"match": [], "truncated": [], "mismatch": []}
+    started = time.perf_counter()
+    for kind, post, text in cases:
+        scores[kind].append(text_match_ratio(post, text))
+    per_call_ms = (time.perf_counter() - started) / len(cases) * 1000
+
+    print(f"{len(cases)} screenshots, OCR noise {args.noise:.0%}, {per_call_ms:.2f} ms per text match\n")
+    for kind, values in scores.items():
+        if values:
+            values = sorted(values)
+            print(
+                f"  {kind:<10} {len(values):5d}   min {values[0]:.2f}   p10 {values[len(values) // 10]:.2f}   "
+                f"median {statistics.median(values):.2f}   max {values[-1]:.2f}"
+            )
+
+    rejected = {kind: sum(1 for score in values if score < args.reject_below) for kind, values in scores.items()}
+    approvable = {kind: sum(1 for score in values if score >= args.approve_above) for kind, values in scores.items()}
+    escalated = len(cases) - sum(rejected.values())
+
+    print(f"\nReject below {args.reject_below:.2f}")
+    print(f"  mismatches rejected locally   {rejected['mismatch']:5d} of {len(scores['mismatch'])}")
+    print(f"  genuine posts wrongly rejected {rejected['match'] + rejected['truncated']:4d}")
+    print(f"  Gemini calls                  {escalated:5d} of {len(cases)} ({1 - escalated / len(cases):.0%} saved)")
+    print(f"\nWith local approval at {args.approve_above:.2f} (still needs the UI and \"You\" marker in the text)")
+    print(f"  genuine posts approvable      {approvable['match'] + approvable['truncated']:5d}")
+    print(f"  mismatches approvable         {approvable['mismatch']:5d}")
+    print(f"  Gemini calls                  {escalated - sum(approvable.values()):5d} of {len(cases)}")
+
+
+if __name__ == "__main__":
+    main()
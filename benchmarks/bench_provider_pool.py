@@ -0,0 +1,112 @@
+"""
+Contract reads through the provider pool over several fake chain nodes with
+different latencies, against the same reads through the slowest node alone.
+Halfway through the pooled run the fastest node starts failing, to show the
+pool ejecting it and moving on without surfacing errors.
+
+    python -m benchmarks.bench_provider_pool --reads 300 --latencies 0.005,0.05,0.15
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from web3 import Web3
+from eth_account import Account
+from benchmarks.fakes.fake_chain import start_fake_chain
+from app.blockchain.contract_abi_loader import linkedin_contract_abi
+from app.blockchain.provider_pool import ProviderPool
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_reads(contract, reads, concurrency, on_halfway=None):
+    def read_once(index):
+        if on_halfway and index == reads // 2:
+            on_halfway()
+        started = time.perf_counter()
+        try:
+            contract.functions.getSubmittedCids().call()
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(read_once, range(reads)))
+    return results, time.perf_counter() - started
+
+
+def report(label, results, wall_time):
+    timings = sorted(elapsed for elapsed, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    print(
+        f"{label:<28} {len(timings):5d} reads  {errors:4d} err  {len(timings) / wall_time:8.1f} reads/s   "
+        f"p50 {percentile(timings, 0.50) * 1000:7.1f} ms   p95 {percentile(timings, 0.95) * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latencies", default="0.005,0.05,0.15", help="comma-separated node latencies in seconds")
+    args = parser.parse_args()
+
+    latencies = [float(latency) for latency in args.latencies.split(",")]
+    owner = Account.create()
+    contract_address = Account.create().address
+
+    servers, urls, chain = [], [], None
+    for latency in latencies:
+        server, chain, url = start_fake_chain(linkedin_contract_abi, contract_address, owner.address, latency=latency, chain=chain)
+        servers.append(server)
+        urls.append(url)
+    fastest = servers[latencies.index(min(latencies))]
+    slowest_url = urls[latencies.index(max(latencies))]
+
+    def contract_over(provider):
+        web3 = Web3(provider)
+        return web3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=linkedin_contract_abi)
+
+    print(f"Nodes: {', '.join(f'{latency * 1000:.0f} ms' for latency in latencies)}\n")
+
+    single = ProviderPool([slowest_url], timeout=5)
+    results, wall_time = run_reads(contract_over(single), args.reads, args.concurrency)
+    report("slowest node alone", results, wall_time)
+
+    pool = ProviderPool(urls, timeout=5, failure_threshold=2, cooldown=60)
+    results, wall_time = run_reads(contract_over(pool), args.reads, args.concurrency)
+    report("pool", results, wall_time)
+
+    pool = ProviderPool(urls, timeout=5, failure_threshold=2, cooldown=60)
+
+    def knock_out_fastest():
+        fastest.RequestHandlerClass.failing = True
+
+    results, wall_time = run_reads(contract_over(pool), args.reads, args.concurrency, on_halfway=knock_out_fastest)
+    report("pool, fastest fails halfway", results, wall_time)
+
+    print("\nEndpoints after the failover run")
+    for endpoint in pool.stats():
+        print(
+            f"  {endpoint['endpoint']:<24} {endpoint['state']:<9} median {endpoint['latency_ms']:7.1f} ms   "
+            f"{endpoint['requests']:5d} requests  {endpoint['failures']:3d} failures"
+        )
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Signature verifications per second on one core: the previous
+encode_defunct + recover_message path, digest recovery, and cached retries.
+
+    python -m benchmarks.bench_signature_verification --signatures 500
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from app.blockchain import verification_service
+
+
+def _rate(label, verify, signed, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for address, signature in signed:
+            verify(address, signature)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {len(signed) * repeat / elapsed:10.0f} verifications/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--signatures", type=int, default=500)
+    args = parser.parse_args()
+
+    message = encode_defunct(text=verification_service.ORIGINAL_REGISTER_MESSAGE)
+    signed = []
+    for _ in range(args.signatures):
+        account = Account.create()
+        signed.append((account.address, account.sign_message(message).signature.to_0x_hex()))
+
+    def previous_path(address, signature):
+        signer = Web3().eth.account.recover_message(encode_defunct(text=verification_service.ORIGINAL_REGISTER_MESSAGE), signature=signature)
+        assert signer == address
+
+    def digest_path(address, signature):
+        signer = verification_service.recover_signer.__wrapped__(verification_service.REGISTER_MESSAGE_HASH, signature)
+        assert signer == address
+
+    def verify_register(address, signature):
+        verification_service.verify_register_data(wallet_address=address, signed_message=signature, username="benchmark")
+
+    print(f"{args.signatures} distinct signatures")
+    _rate("recover_message (before)", previous_path, signed)
+    _rate("digest recovery", digest_path, signed)
+    verification_service.recover_signer.cache_clear()
+    _rate("verify_register_data, cold", verify_register, signed)
+    _rate("verify_register_data, warm", verify_register, signed, repeat=5)
+
+
+if __name__ == "__main__":
+    main()
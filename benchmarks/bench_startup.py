@@ -0,0 +1,104 @@
+"""
+Cold start of the app: time to import run.py and build create_app(), time to the
+first /welcome response, and how many RPC calls the chain node saw before that,
+each measured in a fresh interpreter. Runs against a fake node with --rpc-latency
+per call, and against an unreachable provider to check startup doesn't depend on it.
+
+    python -m benchmarks.bench_startup --runs 5 --rpc-latency 0.2
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from eth_account import Account
+from benchmarks.fakes.fake_chain import start_fake_chain
+from app.blockchain.contract_abi_loader import linkedin_contract_abi
+
+# Runs in the child interpreter; started outside the repository to check the ABI path too
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {repo_root!r})
+from run import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get("/welcome")
+served = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": served - created,
+    "total": served - started,
+    "status": response.status_code,
+}}))
+"""
+
+
+def run_once(env, work_dir):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT.format(repo_root=REPO_ROOT)],
+        env=env, cwd=work_dir, capture_output=True, text=True, timeout=120,
+    )
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr.strip() else "startup failed")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def report(label, results, rpc_calls=None):
+    def median_ms(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    statuses = sorted({result["status"] for result in results})
+    line = (
+        f"{label:<22} import {median_ms('import'):7.1f} ms   create_app {median_ms('create_app'):7.1f} ms   "
+        f"first /welcome {median_ms('first_request'):6.1f} ms   total {median_ms('total'):7.1f} ms   status {statuses}"
+    )
+    if rpc_calls is not None:
+        line += f"   rpc calls/run {rpc_calls / len(results):.1f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rpc-latency", type=float, default=0.2, help="fake chain node latency per call in seconds")
+    args = parser.parse_args()
+
+    owner = Account.create()
+    contract_address = Account.create().address
+    _, chain, rpc_url = start_fake_chain(linkedin_contract_abi, contract_address, owner.address, latency=args.rpc_latency)
+
+    work_dir = tempfile.mkdtemp(prefix="post-reward-startup-")
+    base_env = dict(os.environ)
+    base_env.update({
+        "LINKEDIN_CONTRACT_ADDRESS": contract_address,
+        "OWNER_PUBLIC_ADDRESS": owner.address,
+        "OWNER_PRIVATE_KEY": owner.key.to_0x_hex(),
+        "LOG_LEVEL": "WARNING",
+        "RATING_STORE_PATH": os.path.join(work_dir, "ratings.sqlite3"),
+        "SUBMISSION_QUEUE_PATH": os.path.join(work_dir, "submission_queue.sqlite3"),
+        "FINGERPRINT_DB_PATH": os.path.join(work_dir, "fingerprints.sqlite3"),
+        "POST_CACHE_DIR": os.path.join(work_dir, "posts"),
+    })
+
+    print(f"{args.runs} cold starts each, median\n")
+
+    calls_before = chain.calls
+    results = [run_once({**base_env, "ALCHEMY_PROVIDER": rpc_url}, work_dir) for _ in range(args.runs)]
+    report(f"node +{args.rpc_latency * 1000:.0f} ms/call", results, chain.calls - calls_before)
+
+    # Nothing listens on port 9, so every connection attempt is refused
+    results = [run_once({**base_env, "ALCHEMY_PROVIDER": "http://127.0.0.1:9"}, work_dir) for _ in range(args.runs)]
+    report("unreachable provider", results)
+
+
+if __name__ == "__main__":
+    main()
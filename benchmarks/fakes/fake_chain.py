@@ -0,0 +1,386 @@
+"""
+Local stand-in for an Ethereum JSON-RPC node running the LinkedIn post reward contract.
+The repository only ships the contract ABI, not its bytecode, so instead of an EVM this
+node decodes eth_call and raw transactions with the ABI and applies the contract's
+rules to in-memory state. Every transaction is mined immediately in its own block.
+"""
+import json
+import time
+import hashlib
+import threading
+import rlp
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from eth_utils.abi import get_abi_input_types, get_abi_output_types, function_abi_to_4byte_selector, event_abi_to_log_topic
+
+CHAIN_ID = 31337
+GAS_PRICE = 1_000_000_000
+# Rough gas model, so batched and single writes can be compared: a flat cost per transaction plus a cost per event
+TRANSACTION_BASE_GAS = 21_000
+GAS_PER_EVENT = 60_000
+EMPTY_BLOOM = "0x" + "00" * 256
+
+
+class ContractReverted(Exception):
+    pass
+
+
+def _hex(value):
+    return hex(value)
+
+
+def _revert_data(reason):
+    # Solidity Error(string)
+    return "0x08c379a0" + encode(["string"], [reason]).hex()
+
+
+class FakeLinkedInContract:
+    """
+    In-memory version of the contract: registrations, one CID per user, the submission list and the winner.
+    """
+
+    def __init__(self, abi, owner):
+        self.owner = to_checksum_address(owner)
+        self.usernames = {}
+        self.post_cids = {}
+        self.submissions = []
+        self.winner = "0x" + "00" * 20
+        self.functions = {
+            function_abi_to_4byte_selector(entry): entry
+            for entry in abi if entry["type"] == "function"
+        }
+        self.event_topics = {
+            entry["name"]: "0x" + event_abi_to_log_topic(entry).hex()
+            for entry in abi if entry["type"] == "event"
+        }
+
+    def decode_input(self, data):
+        data = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+        function_abi = self.functions.get(data[:4])
+        if function_abi is None:
+            raise ContractReverted("unknown function selector")
+        return function_abi, decode(get_abi_input_types(function_abi), data[4:])
+
+    def call(self, data, sender=None):
+        function_abi, args = self.decode_input(data)
+        name = function_abi["name"]
+
+        if name == "userToName":
+            result = [self.usernames.get(to_checksum_address(args[0]), "")]
+        elif name == "isPostSubmitted":
+            result = [to_checksum_address(args[0]) in self.post_cids]
+        elif name == "getPostCid":
+            result = [self.post_cids.get(to_checksum_address(args[0]), "")]
+        elif name == "getSubmittedCids":
+            result = [list(self.submissions)]
+        elif name == "isUserRegistered":
+            result = [bool(sender) and to_checksum_address(sender) in self.usernames]
+        elif name == "owner":
+            result = [self.owner]
+        elif name == "pendingOwner":
+            result = ["0x" + "00" * 20]
+        elif name == "winner":
+            result = [self.winner]
+        else:
+            raise ContractReverted(f"{name} is not a view function")
+
+        return "0x" + encode(get_abi_output_types(function_abi), result).hex()
+
+    def transact(self, data, sender):
+        """
+        Apply a state-changing call and return the logs it emits as (event name, indexed topics, data hex).
+        """
+        function_abi, args = self.decode_input(data)
+        name = function_abi["name"]
+
+        if name not in ("register_user", "submit_cid", "submit_cids", "announce_winner"):
+            raise ContractReverted(f"{name} is not supported by the fake contract")
+        if to_checksum_address(sender) != self.owner:
+            raise ContractReverted("OwnableUnauthorizedAccount")
+
+        if name == "submit_cids":
+            return self._submit_cids(args[0], args[1])
+
+        user_address = to_checksum_address(args[0])
+        user_topic = "0x" + encode(["address"], [user_address]).hex()
+
+        if name == "register_user":
+            if user_address in self.usernames:
+                raise ContractReverted("User already registered")
+            self.usernames[user_address] = args[1]
+            return [("UserRegistered", [user_topic], "0x" + encode(["uint256"], [int(time.time())]).hex())]
+
+        if name == "submit_cid":
+            return self._submit_cids([user_address], [args[1]])
+
+        self.winner = user_address
+        return [("WinnerAnnounced", [user_topic], "0x")]
+
+    def _submit_cids(self, user_addresses, post_cids):
+        # All or nothing, like a reverting Solidity loop
+        user_addresses = [to_checksum_address(user_address) for user_address in user_addresses]
+        if len(user_addresses) != len(post_cids):
+            raise ContractReverted("Length mismatch")
+        if len(set(user_addresses)) != len(user_addresses):
+            raise ContractReverted("Post already submitted")
+        for user_address in user_addresses:
+            if user_address not in self.usernames:
+                raise ContractReverted("User not registered")
+            if user_address in self.post_cids:
+                raise ContractReverted("Post already submitted")
+
+        logs = []
+        for user_address, post_cid in zip(user_addresses, post_cids):
+            self.post_cids[user_address] = post_cid
+            self.submissions.append((user_address, post_cid))
+            user_topic = "0x" + encode(["address"], [user_address]).hex()
+            logs.append(("PostCidSubmitted", [user_topic], "0x" + encode(["string"], [post_cid]).hex()))
+        return logs
+
+
+def decode_raw_transaction(raw_transaction):
+    """
+    Return (sender, nonce, to, data) of a signed legacy, EIP-2930 or EIP-1559 transaction.
+    """
+    raw = bytes.fromhex(raw_transaction[2:])
+    sender = Account.recover_transaction(raw)
+    if raw[0] >= 0xc0:
+        nonce, _, _, to, _, data = rlp.decode(raw)[:6]
+    elif raw[0] == 1:
+        _, nonce, _, _, to, _, data = rlp.decode(raw[1:])[:7]
+    else:
+        _, nonce, _, _, _, to, _, data = rlp.decode(raw[1:])[:8]
+    return sender, int.from_bytes(nonce, "big"), "0x" + to.hex(), "0x" + data.hex()
+
+
+class FakeChain:
+    """
+    Chain state shared by every request to the fake node.
+    """
+
+    def __init__(self, abi, contract_address, owner):
+        self.contract_address = to_checksum_address(contract_address)
+        self.contract = FakeLinkedInContract(abi, owner)
+        self.block_number = 1
+        self.nonces = {}
+        self.receipts = {}
+        self.logs = []
+        self.calls = 0
+        self.total_gas_used = 0
+        self._lock = threading.Lock()
+
+    def _block_hash(self, block_number):
+        return "0x" + hashlib.sha256(f"block-{block_number}".encode()).hexdigest()
+
+    def _revert(self, reason):
+        return {"code": 3, "message": f"execution reverted: {reason}", "data": _revert_data(reason)}
+
+    def handle(self, method, params):
+        """
+        Return (result, error) for a single JSON-RPC call.
+        """
+        with self._lock:
+            self.calls += 1
+            if method == "web3_clientVersion":
+                return "FakeChain/v1", None
+            if method in ("eth_chainId", "net_version"):
+                return (_hex(CHAIN_ID) if method == "eth_chainId" else str(CHAIN_ID)), None
+            if method == "eth_blockNumber":
+                return _hex(self.block_number), None
+            if method == "eth_gasPrice":
+                return _hex(GAS_PRICE), None
+            if method == "eth_getTransactionCount":
+                return _hex(self.nonces.get(to_checksum_address(params[0]), 0)), None
+            if method == "eth_getTransactionReceipt":
+                return self.receipts.get(params[0].lower()), None
+            if method == "eth_getLogs":
+                return self._get_logs(params[0]), None
+            if method == "eth_getBlockByNumber":
+                return self._block(self._block_param(params[0])), None
+            if method in ("eth_call", "eth_estimateGas"):
+                transaction = params[0]
+                try:
+                    if method == "eth_call":
+                        return self.contract.call(transaction.get("data") or transaction.get("input"), transaction.get("from")), None
+                    # Dry-run the transaction against a throwaway copy of the state
+                    emitted = self._dry_run(transaction)
+                    return _hex(self._gas_used(emitted)), None
+                except ContractReverted as reverted:
+                    return None, self._revert(str(reverted))
+            if method == "eth_sendRawTransaction":
+                return self._send_raw_transaction(params[0])
+        return None, {"code": -32601, "message": f"Method {method} not supported by the fake chain"}
+
+    def _dry_run(self, transaction):
+        contract = self.contract
+        snapshot = (dict(contract.usernames), dict(contract.post_cids), list(contract.submissions), contract.winner)
+        try:
+            return contract.transact(transaction.get("data") or transaction.get("input"), transaction.get("from"))
+        finally:
+            contract.usernames, contract.post_cids, contract.submissions, contract.winner = snapshot
+
+    def _gas_used(self, emitted):
+        return TRANSACTION_BASE_GAS + GAS_PER_EVENT * len(emitted)
+
+    def _send_raw_transaction(self, raw_transaction):
+        sender, nonce, to, data = decode_raw_transaction(raw_transaction)
+        expected_nonce = self.nonces.get(sender, 0)
+        if nonce != expected_nonce:
+            return None, {"code": -32000, "message": f"nonce too {'low' if nonce < expected_nonce else 'high'}"}
+
+        tx_hash = "0x" + keccak(hexstr=raw_transaction).hex()
+        self.nonces[sender] = nonce + 1
+        self.block_number += 1
+        block_hash = self._block_hash(self.block_number)
+
+        status = 1
+        emitted = []
+        if to_checksum_address(to) == self.contract_address:
+            try:
+                emitted = self.contract.transact(data, sender)
+            except ContractReverted:
+                status = 0
+
+        self.total_gas_used += self._gas_used(emitted)
+        logs = []
+        for log_index, (event_name, topics, log_data) in enumerate(emitted):
+            log = {
+                "address": self.contract_address,
+                "topics": [self.contract.event_topics[event_name], *topics],
+                "data": log_data,
+                "blockNumber": _hex(self.block_number),
+                "blockHash": block_hash,
+                "transactionHash": tx_hash,
+                "transactionIndex": "0x0",
+                "logIndex": _hex(log_index),
+                "removed": False,
+            }
+            logs.append(log)
+            self.logs.append(log)
+
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": block_hash,
+            "blockNumber": _hex(self.block_number),
+            "from": sender,
+            "to": to_checksum_address(to),
+            "contractAddress": None,
+            "cumulativeGasUsed": _hex(self._gas_used(emitted)),
+            "gasUsed": _hex(self._gas_used(emitted)),
+            "effectiveGasPrice": _hex(GAS_PRICE),
+            "logs": logs,
+            "logsBloom": EMPTY_BLOOM,
+            "status": _hex(status),
+            "type": "0x0",
+        }
+        return tx_hash, None
+
+    def _get_logs(self, log_filter):
+        from_block = self._block_param(log_filter.get("fromBlock", "earliest"))
+        to_block = self._block_param(log_filter.get("toBlock", "latest"))
+        address = log_filter.get("address")
+        # web3 may send a single address or a list of them
+        addresses = None if address is None else {to_checksum_address(item) for item in ([address] if isinstance(address, str) else address)}
+        topics = log_filter.get("topics") or []
+        wanted_topic = topics[0] if topics else None
+        return [
+            log for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (addresses is None or log["address"] in addresses)
+            and (wanted_topic is None or log["topics"][0] == wanted_topic)
+        ]
+
+    def _block_param(self, value):
+        if value == "earliest":
+            return 0
+        if value in ("latest", "pending", "safe", "finalized"):
+            return self.block_number
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+    def _block(self, block_number):
+        return {
+            "number": _hex(block_number),
+            "hash": self._block_hash(block_number),
+            "parentHash": self._block_hash(block_number - 1),
+            "timestamp": _hex(int(time.time())),
+            "gasLimit": _hex(30_000_000),
+            "gasUsed": "0x0",
+            "baseFeePerGas": _hex(GAS_PRICE // 2),
+            "miner": "0x" + "00" * 20,
+            "difficulty": "0x0",
+            "totalDifficulty": "0x0",
+            "extraData": "0x",
+            "size": "0x0",
+            "nonce": "0x0000000000000000",
+            "sha3Uncles": "0x" + "00" * 32,
+            "logsBloom": EMPTY_BLOOM,
+            "transactionsRoot": "0x" + "00" * 32,
+            "stateRoot": "0x" + "00" * 32,
+            "receiptsRoot": "0x" + "00" * 32,
+            "mixHash": "0x" + "00" * 32,
+            "transactions": [],
+            "uncles": [],
+        }
+
+
+class FakeChainHandler(BaseHTTPRequestHandler):
+    chain = None
+    latency = 0.0
+    # Set on a running node's handler class to make it answer 503, e.g. to test failover
+    failing = False
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this every keep-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def _respond(self, request):
+        result, error = self.chain.handle(request.get("method"), request.get("params") or [])
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        if error is not None:
+            response["error"] = error
+        else:
+            response["result"] = result
+        return response
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if isinstance(payload, list):
+            body = [self._respond(request) for request in payload]
+        else:
+            body = self._respond(payload)
+
+        body = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_chain(abi, contract_address, owner, latency=0.0, chain=None, host="127.0.0.1", port=0):
+    """
+    Start a fake node in a daemon thread. Returns (server, chain, rpc_url).
+    Pass the chain of another node to start one more node serving the same state.
+    """
+    chain = chain or FakeChain(abi, contract_address, owner)
+    handler = type("ConfiguredFakeChainHandler", (FakeChainHandler,), {"chain": chain, "latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-chain", daemon=True).start()
+    return server, chain, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,78 @@
+"""
+Local stand-in for the Gemini generateContent REST endpoint.
+Screenshot checks always pass; ratings are a stable hash of the prompt text.
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_POST_PART = re.compile(r'<post-(\w+) id="(\d+)">\n(.*?)\n</post-\1>', re.DOTALL)
+
+
+def _fake_score(text):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16) % 100 + 1
+
+
+def fake_model_output(request_body):
+    parts = [part for content in request_body.get("contents", []) for part in content.get("parts", [])]
+    if any("inlineData" in part or "inline_data" in part for part in parts):
+        return {"is_linkedIn_post": True, "is_my_post": True, "match_pr": 0.95}
+
+    prompt_text = "".join(part.get("text", "") for part in parts)
+    response_schema = request_body.get("generationConfig", {}).get("responseSchema") or {}
+    if str(response_schema.get("type", "")).upper() == "ARRAY":
+        # Batched rating prompt: one fenced part per post
+        return [
+            {"post_id": int(post_id), "overall_score": _fake_score(post_content)}
+            for _, post_id, post_content in BATCH_POST_PART.findall(prompt_text)
+        ]
+
+    return {"overall_score": _fake_score(prompt_text)}
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this every keep-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = json.loads(self.rfile.read(length) or b"{}")
+
+        if ":generateContent" not in self.path:
+            self.send_error(404)
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        body = json.dumps({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": json.dumps(fake_model_output(request_body))}]},
+                "finishReason": "STOP",
+            }]
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_gemini(latency=0.0, host="127.0.0.1", port=0):
+    """
+    Start the fake in a daemon thread. Returns (server, base_url).
+    """
+    handler = type("ConfiguredFakeGeminiHandler", (FakeGeminiHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-gemini", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the Pinata endpoints the backend uses: the private file upload,
+the presigned download link request and the download itself.
+Uploaded files are kept in memory and addressed by a content hash.
+"""
+import json
+import time
+import hashlib
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+def _multipart_files(content_type, body):
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+    )
+    return [(part.get_filename(), part.get_payload(decode=True)) for part in message.iter_parts() if part.get_filename()]
+
+
+def _file_key(path):
+    # Everything after /files/: the CID
+    return urlparse(path).path.split("/files/", 1)[-1]
+
+
+class FakePinataHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    files = None
+    # Number of files in each upload request
+    uploads = None
+    base_url = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this every keep-alive response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path.startswith("/v3/files/private/download_link"):
+            file_url = json.loads(body or b"{}").get("url", "")
+            self._send_json(200, {"data": f"{self.base_url}/files/{_file_key(file_url)}?signature=fake"})
+            return
+
+        if self.path.startswith("/v3/files"):
+            uploaded = _multipart_files(self.headers.get("Content-Type", ""), body)
+            if len(uploaded) != 1:
+                self._send_json(400, {"error": {"code": 400, "message": "Expected one file per upload"}})
+                return
+            self.uploads.append(len(uploaded))
+            file_name, content = uploaded[0]
+            cid = "bafkfake" + hashlib.sha256(content).hexdigest()[:48]
+            self.files[cid] = content
+            self._send_json(200, {"data": {"cid": cid, "name": file_name, "size": len(content)}})
+            return
+
+        self._send_json(404, {"error": {"code": 404, "message": "Unknown endpoint"}})
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        content = self.files.get(_file_key(self.path))
+        if not self.path.startswith("/files/") or content is None:
+            self._send_json(404, {"error": {"code": 404, "message": "File not found"}})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_pinata(latency=0.0, host="127.0.0.1", port=0):
+    """
+    Start the fake in a daemon thread. Returns (server, base_url); the handler class,
+    server.RequestHandlerClass, keeps the uploaded files and upload sizes. Upload to
+    {base_url}/v3/files and request download links from {base_url}/v3/files/private/download_link.
+    """
+    handler = type("ConfiguredFakePinataHandler", (FakePinataHandler,), {"latency": latency, "files": {}, "uploads": []})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    handler.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-pinata", daemon=True).start()
+    return server, handler.base_url
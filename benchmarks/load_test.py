@@ -0,0 +1,294 @@
+"""
+End-to-end load test of the app from run.py against local stand-ins for the
+chain node, Pinata and Gemini, so no real service is called.
+Registers --users wallets, submits one post for each, then announces the result,
+and reports throughput and p50/p95/p99 latency per endpoint.
+
+    python -m benchmarks.load_test --users 200 --concurrency 16 --gemini-latency 0.3
+"""
+import io
+import os
+import sys
+import time
+import random
+import base64
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import requests
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from benchmarks.fakes.fake_chain import start_fake_chain
+from benchmarks.fakes.fake_gemini import start_fake_gemini
+from benchmarks.fakes.fake_pinata import start_fake_pinata
+
+from app.blockchain.verification_service import ORIGINAL_REGISTER_MESSAGE, ORIGINAL_POST_SUBMIT_MESSAGE
+
+# The app's log output goes to stdout, hidden unless --verbose; the report goes to the original stdout
+REPORT_STREAM = sys.stdout
+
+WORDS = (
+    "launch team growth hiring product customers learning leadership design data engineering "
+    "milestone community feedback mentor career startup remote culture release scale impact "
+    "story lesson failure success weekly thanks network conference talk workshop open source"
+).split()
+
+
+def emit(text=""):
+    print(text, file=REPORT_STREAM, flush=True)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def report(label, timings, errors, wall_time):
+    timings = sorted(timings)
+    throughput = len(timings) / wall_time if wall_time else 0.0
+    emit(
+        f"{label:<16} {len(timings):6d} req  {errors:5d} err  {throughput:8.1f} req/s   "
+        f"p50 {percentile(timings, 0.50) * 1000:8.1f} ms   p95 {percentile(timings, 0.95) * 1000:8.1f} ms   "
+        f"p99 {percentile(timings, 0.99) * 1000:8.1f} ms"
+    )
+
+
+def make_screenshot(rng):
+    """
+    A small PNG of random noise, so no two screenshots look like near duplicates.
+    """
+    from PIL import Image
+
+    image = Image.frombytes("L", (64, 48), bytes(rng.getrandbits(8) for _ in range(64 * 48)))
+    output = io.BytesIO()
+    image.resize((320, 240)).save(output, format="PNG")
+    return base64.b64encode(output.getvalue()).decode("ascii")
+
+
+def make_users(count, seed):
+    rng = random.Random(seed)
+    register_message = encode_defunct(text=ORIGINAL_REGISTER_MESSAGE)
+    submit_message = encode_defunct(text=ORIGINAL_POST_SUBMIT_MESSAGE)
+
+    users = []
+    for index in range(count):
+        account = Account.create()
+        users.append({
+            "address": account.address,
+            "username": f"load-test-user-{index}",
+            "register_signature": account.sign_message(register_message).signature.to_0x_hex(),
+            "submit_signature": account.sign_message(submit_message).signature.to_0x_hex(),
+            "post_content": " ".join(rng.choice(WORDS) for _ in range(80)) + f" #{index}",
+            "post_base64": make_screenshot(rng),
+        })
+    return users
+
+
+def configure_environment(args, work_dir):
+    """
+    Start the fakes and point the app's configuration at them. Must run before the app is imported.
+    """
+    from app.blockchain.contract_abi_loader import linkedin_contract_abi as abi
+
+    owner = Account.create()
+    contract_address = Account.create().address
+    _, chain, rpc_url = start_fake_chain(abi, contract_address, owner.address, latency=args.rpc_latency)
+    rpc_urls = [rpc_url]
+    # Extra nodes share the first node's chain state, each a little slower than the last
+    for index in range(1, args.rpc_nodes):
+        _, _, url = start_fake_chain(abi, contract_address, owner.address, latency=args.rpc_latency * (index + 1), chain=chain)
+        rpc_urls.append(url)
+    pinata_server, pinata_url = start_fake_pinata(latency=args.pinata_latency)
+    _, gemini_url = start_fake_gemini(latency=args.gemini_latency)
+
+    os.environ.update({
+        "ALCHEMY_PROVIDER": rpc_url,
+        "WEB3_PROVIDERS": ",".join(rpc_urls),
+        "LINKEDIN_CONTRACT_ADDRESS": contract_address,
+        "OWNER_PUBLIC_ADDRESS": owner.address,
+        "OWNER_PRIVATE_KEY": owner.key.to_0x_hex(),
+        "PINATA_JWT": "Bearer load-test",
+        "PINATA_UPLOAD_URL": f"{pinata_url}/v3/files",
+        "PINATA_DOWNLOAD_URL": f"{pinata_url}/v3/files/private/download_link",
+        "PINATA_GATEWAY_DOMAIN": "load-test",
+        "POST_DATA_PRIVATE_GROUP_ID": "load-test",
+        "GEMINI_API_KEY": "load-test",
+        "GEMINI_MODEL": "fake-model",
+        "GEMINI_BASE_URL": gemini_url,
+        "RECEIPT_POLL_INTERVAL": "0.5",
+        "CID_BATCH_ENABLED": "true" if args.batch_cids else "false",
+        "CID_BATCH_WINDOW_SECONDS": str(args.batch_window),
+        "PINNING_BACKEND": "local" if args.local_pins else "pinata",
+        # Keep every local store out of the working tree
+        "DATA_DIR": work_dir,
+    })
+    return chain, pinata_server
+
+
+def start_app():
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from run import create_app
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, name="load-test-app", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_phase(label, concurrency, items, send):
+    """
+    Call send(session, item) for every item from `concurrency` client threads.
+    send returns True when the response was the expected one.
+    """
+    local = threading.local()
+    timings = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def run_one(item):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = send(session, item)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            timings.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_one, items))
+    report(label, timings, errors[0], time.perf_counter() - started)
+
+
+def wait_for_jobs(base_url, job_ids, timeout):
+    deadline = time.time() + timeout
+    pending = set(job_ids)
+    while pending and time.time() < deadline:
+        for job_id in list(pending):
+            status = requests.get(f"{base_url}/jobs/{job_id}", timeout=10).json().get("status")
+            if status in ("finished", "failed"):
+                pending.discard(job_id)
+        time.sleep(0.2)
+    return len(pending)
+
+
+def announce(base_url, timeout):
+    """
+    Poll /announce-result until the winner is announced.
+    Returns (seconds, polls, final response, last progress report).
+    """
+    started = time.perf_counter()
+    polls = 0
+    progress = None
+    while time.perf_counter() - started < timeout:
+        response = requests.get(f"{base_url}/announce-result", timeout=60)
+        polls += 1
+        if response.status_code != 202:
+            return time.perf_counter() - started, polls, response, progress
+        progress = response.json()
+        time.sleep(0.2)
+    return time.perf_counter() - started, polls, None, progress
+
+
+def print_dependency_latency(base_url):
+    sums, counts = {}, {}
+    for line in requests.get(f"{base_url}/metrics", timeout=10).text.splitlines():
+        if line.startswith("post_reward_dependency_call_seconds_sum"):
+            sums[line.split('"')[1]] = float(line.rsplit(" ", 1)[1])
+        elif line.startswith("post_reward_dependency_call_seconds_count"):
+            counts[line.split('"')[1]] = int(line.rsplit(" ", 1)[1])
+    emit("\nDependency calls (from /metrics)")
+    for dependency in sorted(counts):
+        emit(f"  {dependency:<24} {counts[dependency]:6d} calls   mean {sums[dependency] / counts[dependency] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="fake Gemini latency in seconds")
+    parser.add_argument("--pinata-latency", type=float, default=0.0, help="fake Pinata latency in seconds")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="fake chain node latency in seconds")
+    parser.add_argument("--rpc-nodes", type=int, default=1, help="fake chain nodes behind the provider pool")
+    parser.add_argument("--batch-cids", action="store_true", help="commit CIDs in submit_cids batches")
+    parser.add_argument("--batch-window", type=float, default=0.5, help="CID batch window in seconds")
+    parser.add_argument("--local-pins", action="store_true", help="pin to the local filesystem backend instead of the fake Pinata")
+    parser.add_argument("--async-submit", action="store_true", help="use /submit-post?async=true and wait for the jobs")
+    parser.add_argument("--announce-timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="show the app's own output")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+
+    work_dir = tempfile.mkdtemp(prefix="post-reward-load-test-")
+    chain, pinata_server = configure_environment(args, work_dir)
+    emit(f"Preparing {args.users} users...")
+    users = make_users(args.users, args.seed)
+    _, base_url = start_app()
+    emit(f"App at {base_url}, local state in {work_dir}\n")
+
+    def register(session, user):
+        response = session.post(f"{base_url}/register-user", json={
+            "walletAddress": user["address"],
+            "signedMessage": user["register_signature"],
+            "username": user["username"],
+        }, timeout=60)
+        return response.status_code == 201 or response.ok
+
+    job_ids = []
+
+    def submit(session, user):
+        url = f"{base_url}/submit-post" + ("?async=true" if args.async_submit else "")
+        response = session.post(url, json={
+            "userAddress": user["address"],
+            "postContent": user["post_content"],
+            "postBase64": user["post_base64"],
+            "signedMessage": user["submit_signature"],
+        }, timeout=120)
+        if args.async_submit and response.status_code == 202:
+            job_ids.append(response.json()["job_id"])
+        return response.ok
+
+    run_phase("/register-user", args.concurrency, users, register)
+    run_phase("/submit-post", args.concurrency, users, submit)
+
+    if args.async_submit:
+        started = time.perf_counter()
+        unfinished = wait_for_jobs(base_url, job_ids, args.announce_timeout)
+        emit(f"{'submit jobs':<16} {len(job_ids):6d} jobs  {unfinished:5d} unfinished after {time.perf_counter() - started:.2f} s")
+
+    elapsed, polls, response, progress = announce(base_url, args.announce_timeout)
+    if response is None:
+        emit(f"{'/announce-result':<16} timed out after {elapsed:.2f} s")
+    else:
+        emit(f"{'/announce-result':<16} {response.status_code} after {elapsed:.2f} s ({polls} polls) for {len(chain.contract.submissions)} posts")
+    if progress is not None:
+        emit(f"{'':<16} announcement snapshot: {progress['total']} posts, {progress['rated']} rated when last polled")
+
+    uploads = pinata_server.RequestHandlerClass.uploads
+    emit(f"Pinata upload requests: {len(uploads)} for {sum(uploads)} files")
+    emit(f"Gas used by owner transactions: {chain.total_gas_used} ({chain.total_gas_used / max(1, len(chain.contract.submissions)):.0f} per post incl. registration)")
+    emit(f"\nRPC calls served by the fake node{'s' if args.rpc_nodes > 1 else ''}: {chain.calls}")
+    print_dependency_latency(base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ from flask_smorest import Api
 from flask_cors import CORS
 
 from app.api.routes import post_blp as post_blueprint
+from app.services.scoring_service import invalidate_stale_ratings
+from app.blockchain.web3_services import start_event_indexer
+from app.services.submission_queue import submission_queue
+from app.services.metrics_service import instrument_app
+from app.services.logging_service import configure_logging, init_request_logging
 
 
 def create_app():
     load_dotenv()
+    configure_logging()
     app = Flask(__name__)
 
     app.config["PROPAGATE_EXCEPTIONS"] = True
@@ -26,9 +32,21 @@ def create_app():
 
     CORS(app, resources={r"/*": cors_config})
 
+    # Per-request correlation ids, echoed back in X-Request-ID
+    init_request_logging(app)
+    # Per-endpoint request timings, exposed at /metrics
+    instrument_app(app)
+
     api = Api(app=app)
 
     api.register_blueprint(post_blueprint)
 
+    invalidate_stale_ratings()
+    start_event_indexer()
+
+    # Pick up asynchronous submissions left over from a previous run
+    if submission_queue.has_pending_jobs():
+        submission_queue.start()
+
     return app
 